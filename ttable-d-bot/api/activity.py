@@ -0,0 +1,119 @@
+import sys
+from dataclasses import dataclass
+from datetime import date as dt_date
+
+from constants.api import *
+
+
+@dataclass(slots=True, frozen=True)
+class Activity:
+    """A single activity, e.g. one lecture stream, with its times pre-parsed
+    so consumers don't have to re-parse the API's strings.
+
+    The weeks an activity runs in are a bitmask, so two activities share a
+    week if their (aligned) masks AND to non-zero, regardless of how many
+    or which weeks each runs in.
+
+    `CourseTimetable.get_activities` keeps the dicts the API returned (and
+    the cache stores), these are built from them.
+    """
+    key: str  # e.g. "CSSE2010-S2-STLUC-IN|PRA1|01-P1"
+    course: str  # e.g. "CSSE2010-S2-STLUC-IN"
+    group: str  # e.g. "PRA1"
+    code: str  # e.g. "01-P1"
+    activity_type: str  # One of TTableInputs.ActivityTypes' values
+    location: str
+    day: int  # Index into DAY_NAMES
+    start: int  # Minutes since midnight
+    end: int  # Minutes since midnight
+    week_offset: int  # Week number of the first bit of `week_mask`
+    week_mask: int  # Bit i set if the activity runs in week week_offset + i
+    linked: tuple[str, ...]  # Keys of the activities paired with this one
+
+    @classmethod
+    def from_dict(cls, key: str, data: dict) -> "Activity":
+        """Builds an Activity from an activity dict, after
+        `CourseTimetable.reformat_course_data`.
+
+        :param key: The activity's key in `CourseTimetable.get_activities`.
+        :type key: str
+
+        :param data: The activity's dict.
+        :type data: dict
+
+        :rtype: Activity
+        """
+        course, group, code = key.split("|")
+        if "week_mask" in data:
+            week_offset, week_mask = data["week_offset"], data["week_mask"]
+        else:
+            week_offset, week_mask = cls.weeks_to_mask(
+                data.get("schedule", []))
+
+        return cls(
+            key=key,
+            course=sys.intern(course),
+            group=sys.intern(group),
+            code=code,
+            activity_type=sys.intern(data["activity"]),
+            location=sys.intern(data.get("location", "")),
+            day=DAY_NAMES.index(data["day"]),
+            start=cls.to_minutes(data["start_time"]),
+            end=cls.to_minutes(data["end_time"]),
+            week_offset=week_offset,
+            week_mask=week_mask,
+            linked=tuple(data.get("group", ())),
+        )
+
+    @staticmethod
+    def to_minutes(time: str) -> int:
+        """Converts a `DATETIME_FORMAT` time, e.g. "13:30", to minutes since
+        midnight.
+        """
+        hours, minutes = time.split(":")
+        return int(hours) * 60 + int(minutes)
+
+    @staticmethod
+    def week_number(date: str) -> int:
+        """Converts a "schedule" date, e.g. "24/07/2023", to the number of
+        Monday to Sunday weeks since 1/1/1, which was a Monday. Split by hand
+        as strptime is slow for every date of every activity.
+        """
+        day, month, year = date.split("/")
+        ordinal = dt_date(int(year), int(month), int(day)).toordinal()
+        return (ordinal - 1) // 7
+
+    @classmethod
+    def weeks_to_mask(cls, schedule: list[str]) -> tuple[int, int]:
+        """Converts a list of dates to a (week_offset, week_mask) pair."""
+        weeks = [cls.week_number(date) for date in schedule]
+        if not weeks:
+            return 0, 0
+
+        week_offset = min(weeks)
+        week_mask = 0
+        for week in weeks:
+            week_mask |= 1 << (week - week_offset)
+        return week_offset, week_mask
+
+    def weeks(self) -> list[int]:
+        """Returns the week numbers the activity runs in."""
+        return [self.week_offset + i
+                for i in range(self.week_mask.bit_length())
+                if self.week_mask >> i & 1]
+
+    def shares_week_with(self, other: "Activity") -> bool:
+        if self.week_offset <= other.week_offset:
+            return bool(self.week_mask >> (other.week_offset -
+                                           self.week_offset)
+                        & other.week_mask)
+        return other.shares_week_with(self)
+
+    def clashes_with(self, other: "Activity") -> bool:
+        """Checks if the activities run at the same time on any date,
+        including when one contains the other. Back to back activities
+        don't clash.
+        """
+        return (self.day == other.day and
+                self.start < other.end and other.start < self.end and
+                self.shares_week_with(other))
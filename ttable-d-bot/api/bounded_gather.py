@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from constants.common import *
+
+logging.basicConfig(level=logging.INFO,
+                    format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+
+async def gather_bounded(keys: list[str],
+                         func: Callable[[str], Awaitable[Any]],
+                         concurrency: int,
+                         action: str) -> dict[str, Any]:
+    """Awaits `func` for each key, at most `concurrency` at a time.
+    Duplicate keys are only run once.
+
+    :param keys: The keys to run `func` for, e.g. course codes.
+    :type keys: list[str]
+
+    :param func: Called with a key to start its work.
+    :type func: Callable[[str], Awaitable[Any]]
+
+    :param concurrency: The max number of calls in flight at once.
+    :type concurrency: int
+
+    :param action: What `func` does, for the log, e.g. "Fetching".
+    :type action: str
+
+    :return: Maps each key to its result, or to the exception it raised, so
+        one bad key doesn't fail the rest. In the order the keys were given.
+    :rtype: dict[str, Any]
+    """
+    if concurrency < 1:
+        err_msg = f"Concurrency must be at least 1, {concurrency=}"
+        logger.error(err_msg)
+        raise ValueError(err_msg)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(key: str) -> Any:
+        async with semaphore:
+            return await func(key)
+
+    # dict.fromkeys merges duplicates while keeping the given order.
+    unique_keys = list(dict.fromkeys(keys))
+    results = await asyncio.gather(
+        *(bounded(key) for key in unique_keys),
+        return_exceptions=True
+    )
+
+    for key, result in zip(unique_keys, results):
+        if isinstance(result, Exception):
+            logger.warning(f"{action} {key} failed: {result!r}")
+    return dict(zip(unique_keys, results))
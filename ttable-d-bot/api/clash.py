@@ -0,0 +1,59 @@
+"""
+Finds every pair of clashing activities across a set of courses.
+
+Activities are bucketed by the day they run on, then each day is swept in
+start time order. Activities overlapping in time are then checked for a
+shared week with one AND of their week bitmasks, so the cost is
+O(n log n + k) for n activities and k time overlaps, instead of checking
+every pair.
+"""
+
+import logging
+
+from .timetable_api_calls import CourseTimetable
+
+from constants.common import *
+
+logging.basicConfig(level=logging.INFO,
+                    format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+
+def find_clashes(courses: list[CourseTimetable]) -> list[tuple[str, str]]:
+    """Finds every pair of activities, across all the given courses, that
+    run at the same time on at least one date.
+
+    Activities in the same group of the same course, e.g. two lecture
+    streams or the halves of a paired practical, are never reported, as
+    they are alternatives to or part of each other.
+
+    :param courses: The courses to check.
+    :type courses: list[CourseTimetable]
+
+    :return: The clashing activity keys, each pair and the list sorted.
+    :rtype: list[tuple[str, str]]
+    """
+    days = {}
+    for course in courses:
+        for activity in course.get_activity_records().values():
+            days.setdefault(activity.day, []).append(activity)
+
+    clashes = []
+    for activities in days.values():
+        activities.sort(key=lambda activity: (activity.start, activity.end))
+        # Everything still running when the current activity starts.
+        running = []
+        for activity in activities:
+            running = [other for other in running
+                       if other.end > activity.start]
+            for other in running:
+                if ((activity.course, activity.group) !=
+                        (other.course, other.group) and
+                        activity.shares_week_with(other)):
+                    clashes.append(tuple(sorted((activity.key,
+                                                 other.key))))
+            running.append(activity)
+
+    logger.debug(f"{len(clashes)} clashes found across {len(courses)} "
+                 "courses.")
+    return sorted(clashes)
@@ -0,0 +1,76 @@
+"""
+Bulk ingest, requests every course matching a course code prefix, e.g.
+"CSSE", at once, so a few requests can warm the cache for a whole faculty.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from .TTableInputs import TTableInputs
+from .bounded_gather import gather_bounded
+from .timetable_api_calls import CourseTimetable
+
+from constants.common import *
+from constants.api import *
+
+logging.basicConfig(level=logging.INFO,
+                    format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+
+def split_versions(course_versions: dict) -> dict[str, CourseTimetable]:
+    """Splits an API response into a course per version, each reformatted
+    and linked. CPU bound for a big response, so run it off the event loop.
+
+    :param course_versions: An API response, see `request_course`.
+    :type course_versions: dict
+
+    :return: Version key, e.g. "CSSE2010_S2_STLUC_IN", to course.
+    :rtype: dict[str, CourseTimetable]
+    """
+    return {version: CourseTimetable.from_version(version, course_data)
+            for version, course_data in course_versions.items()}
+
+
+async def ingest_prefixes(
+        prefixes: list[str],
+        store: Callable[[dict[str, CourseTimetable]], Awaitable[None]],
+        semester: TTableInputs.Semester = TTableInputs.Semester.ALL,
+        campus_id: TTableInputs.Campus = TTableInputs.Campus.ALL,
+        concurrency: int = INGEST_CONCURRENCY
+) -> dict[str, int | Exception]:
+    """Requests every course matching each prefix and passes the courses
+    to `store`, a prefix at a time so a whole faculty is never held at once.
+
+    :param prefixes: Course code prefixes, e.g. ["CSSE", "COMP"].
+    :type prefixes: list[str]
+
+    :param store: Awaited with each prefix's `split_versions`.
+    :type store: Callable[[dict[str, CourseTimetable]], Awaitable[None]]
+
+    :param semester: The semester to select.
+    :type semester: TTableInputs.Semester
+
+    :param campus_id: The campus to select.
+    :type campus_id: TTableInputs.Campus
+
+    :param concurrency: Max prefixes being ingested at once, which also
+        bounds how many responses are held in memory.
+    :type concurrency: int
+
+    :return: Prefix to the number of course versions stored, or the
+        exception that prefix failed with. One prefix failing doesn't stop
+        the others.
+    :rtype: dict[str, int | Exception]
+    """
+    async def ingest(prefix: str) -> int:
+        course_versions = await CourseTimetable.async_request_course(
+            prefix, semester, campus_id)
+        versions = await asyncio.to_thread(split_versions,
+                                           course_versions or {})
+        await store(versions)
+        logger.info(f"Ingested {len(versions)} course versions for "
+                    f"{prefix}.")
+        return len(versions)
+
+    return await gather_bounded(prefixes, ingest, concurrency, "Ingesting")
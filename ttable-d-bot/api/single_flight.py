@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from constants.common import *
+
+logging.basicConfig(level=logging.INFO,
+                    format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        """Coalesces concurrent calls for the same key, so that while one
+        call is in flight every later caller awaits that same result instead
+        of starting its own.
+        """
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str,
+                 func: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `func` for `key`, unless a call for `key` is already in
+        flight, in which case its result is awaited instead.
+
+        :param key: The key calls are coalesced on, e.g.
+            "CSSE2010_S2_STLUC".
+        :type key: str
+
+        :param func: Called with no arguments to start the work if nothing
+            is in flight for `key`.
+        :type func: Callable[[], Awaitable[Any]]
+
+        :return: The result of the (possibly shared) call. Exceptions are
+            raised to every waiting caller.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(
+                lambda done: self._forget(key, done))
+        else:
+            logger.debug(f"Joined in-flight call for {key}.")
+
+        # Shielded so one caller being cancelled doesn't cancel the call for
+        # everyone else waiting on it.
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            self._in_flight.pop(key)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._in_flight
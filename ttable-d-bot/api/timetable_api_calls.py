@@ -5,10 +5,13 @@ Edited: Alexander Burow
 License: GPL3
 """
 
+import aiohttp
 import requests
 import logging
 import datetime as dt
 from .TTableInputs import TTableInputs
+from .activity import Activity
+from .bounded_gather import gather_bounded
 
 from constants.common import *
 from constants.api import *
@@ -20,11 +23,20 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 
+class EmptyResponseError(ValueError):
+    """The API returned no course versions, e.g. for a mistyped course code."""
+
+
 class CourseTimetable:
+    # Shared between every instance so that requests reuse the same pool of
+    # keep-alive connections, see `get_session`.
+    _session: aiohttp.ClientSession | None = None
+
     def __init__(self, course: str,
                  semester: TTableInputs.Semester = TTableInputs.Semester.ALL,
                  campus_id: TTableInputs.Campus = TTableInputs.Campus.ALL,
-                 form_type: TTableInputs.Form = TTableInputs.Form.IN) -> None:
+                 form_type: TTableInputs.Form = TTableInputs.Form.IN,
+                 course_versions: dict | None = None) -> None:
         """Initialises a course object, with the given parameters.
 
         :param course: The course ID, e.g. "CSSE2010".
@@ -40,12 +52,19 @@ class CourseTimetable:
             of the course.
         :type form_type: TTableInputs.Form
 
+        :param course_versions: (Optional) An already fetched API response,
+            if not given a (blocking) request is made. Use `create` from
+            async code instead.
+        :type course_versions: dict or None
+
         :rtype: None
         """
         self._input_validation(semester=semester, campus_id=campus_id,
                                form_type=form_type)
 
-        self.course_versions = self.request_course(course, semester, campus_id)
+        if course_versions is None:
+            course_versions = self.request_course(course, semester, campus_id)
+        self.course_versions = course_versions
         course_id = f"{course}_{semester}_{campus_id}_{form_type}"
 
         if course_id in self.course_versions:
@@ -54,7 +73,7 @@ class CourseTimetable:
         elif not self.course_versions:
             err_msg = "API call returned empty. Invalid combination entered!"
             logger.error(err_msg)
-            raise ValueError(err_msg)
+            raise EmptyResponseError(err_msg)
 
         else:
             logger.warning("Request parameters were too ambiguous. So, "
@@ -65,8 +84,121 @@ class CourseTimetable:
                     self.course = self.course_versions[version]
                     break
 
+        self._versions = None
         self.reformat_course_data()
 
+    @classmethod
+    async def create(cls, course: str,
+                     semester: TTableInputs.Semester = TTableInputs.Semester.ALL,
+                     campus_id: TTableInputs.Campus = TTableInputs.Campus.ALL,
+                     form_type: TTableInputs.Form = TTableInputs.Form.IN
+                     ) -> "CourseTimetable":
+        """Async constructor, the request is made without blocking the event
+        loop. Takes the same parameters as `__init__`.
+
+        :rtype: CourseTimetable
+        """
+        cls._input_validation(semester=semester, campus_id=campus_id,
+                              form_type=form_type)
+
+        course_versions = await cls.async_request_course(course, semester,
+                                                         campus_id)
+        return cls(course, semester=semester, campus_id=campus_id,
+                   form_type=form_type, course_versions=course_versions)
+
+    @classmethod
+    def from_cached(cls, course_data: dict, course: str,
+                    semester: TTableInputs.Semester = TTableInputs.Semester.ALL,
+                    campus_id: TTableInputs.Campus = TTableInputs.Campus.ALL,
+                    form_type: TTableInputs.Form = TTableInputs.Form.IN
+                    ) -> "CourseTimetable":
+        """Rebuilds a course from the output of `get_course`, e.g. from the
+        cache, without any request. The activities are already reformatted
+        and linked, so only the index and records are built.
+
+        :param course_data: A previous `get_course`.
+        :type course_data: dict
+
+        The other parameters are the same as `__init__`'s, and should be the
+        ones `course_data` was requested with.
+
+        :rtype: CourseTimetable
+        """
+        cls._input_validation(semester=semester, campus_id=campus_id,
+                              form_type=form_type)
+
+        course_obj = cls.__new__(cls)
+        course_obj.course_versions = {
+            f"{course}_{semester}_{campus_id}_{form_type}": course_data
+        }
+        course_obj.course = course_data
+        course_obj._versions = None
+        course_obj._build_index()
+        return course_obj
+
+    @classmethod
+    def from_version(cls, version: str,
+                     course_data: dict) -> "CourseTimetable":
+        """Builds a course from one version of an API response, without a
+        request. The version's activities are reformatted in place.
+
+        :param version: The version's key in the response, e.g.
+            "CSSE2010_S2_STLUC_IN".
+        :type version: str
+
+        :param course_data: The version's value in the response.
+        :type course_data: dict
+
+        :rtype: CourseTimetable
+        """
+        course_obj = cls.__new__(cls)
+        course_obj.course_versions = {version: course_data}
+        course_obj.course = course_data
+        course_obj._versions = None
+        course_obj.reformat_course_data()
+        return course_obj
+
+    @classmethod
+    async def fetch_many(
+            cls, courses: list[str],
+            semester: TTableInputs.Semester = TTableInputs.Semester.ALL,
+            campus_id: TTableInputs.Campus = TTableInputs.Campus.ALL,
+            form_type: TTableInputs.Form = TTableInputs.Form.IN,
+            concurrency: int = API_MAX_CONCURRENCY
+    ) -> dict[str, "CourseTimetable | Exception"]:
+        """Fetches several courses concurrently, at most `concurrency` at a
+        time. Duplicate course codes are only requested once.
+
+        :param courses: The course IDs, e.g. ["CSSE2010", "CSSE2002"].
+        :type courses: list[str]
+
+        :param semester: The semester to select.
+        :type semester: TTableInputs.Semester
+
+        :param campus_id: The campus to select.
+        :type campus_id: TTableInputs.Campus
+
+        :param form_type: Whether to select the internal or external version
+            of the course.
+        :type form_type: TTableInputs.Form
+
+        :param concurrency: The max number of requests in flight at once.
+        :type concurrency: int
+
+        :return: Maps each course ID to its CourseTimetable, or to the
+            exception raised while fetching it, so one bad course doesn't
+            fail the whole batch.
+        :rtype: dict[str, CourseTimetable | Exception]
+        """
+        cls._input_validation(semester=semester, campus_id=campus_id,
+                              form_type=form_type)
+
+        async def fetch(course: str) -> "CourseTimetable":
+            return await cls.create(course, semester=semester,
+                                    campus_id=campus_id, form_type=form_type)
+
+        return await gather_bounded(courses, fetch, concurrency, "Fetching")
+
     @staticmethod
     def _input_validation(
             semester: TTableInputs.Semester = None,
@@ -139,7 +271,49 @@ class CourseTimetable:
             specified course.
         :rtype: dict
         """
-        data = {
+        data = CourseTimetable._request_data(course, semester, campus_id)
+        return requests.post(TIMETABLE_API_URL, data=data,
+                             timeout=(API_CONNECT_TIMEOUT,
+                                      API_TOTAL_TIMEOUT)).json()
+
+    @staticmethod
+    async def async_request_course(
+            course: str,
+            semester: TTableInputs.Semester = TTableInputs.Semester.ALL,
+            campus_id: TTableInputs.Campus = TTableInputs.Campus.ALL
+    ) -> dict:
+        """Async version of `request_course`, made through the shared
+        connection pool.
+
+        :param course: The course ID, e.g. "CSSE2010".
+        :type course: str
+
+        :param semester: The semester to select.
+        :type semester: TTableInputs.Semester
+
+        :param campus_id: The campus to select.
+        :type campus_id: TTableInputs.Campus
+
+        :return: A dictionary containing the timetable information for the
+            specified course.
+        :rtype: dict
+        """
+        data = CourseTimetable._request_data(course, semester, campus_id)
+        # aiohttp doesn't expand list values like requests does, so the form
+        # is flattened into (key, value) pairs first.
+        form = [(key, str(item))
+                for key, value in data.items()
+                for item in (value if isinstance(value, list) else [value])]
+
+        session = await CourseTimetable.get_session()
+        async with session.post(TIMETABLE_API_URL, data=form) as response:
+            return await response.json(content_type=None)
+
+    @staticmethod
+    def _request_data(course: str,
+                      semester: TTableInputs.Semester,
+                      campus_id: TTableInputs.Campus) -> dict:
+        return {
             "search_term": course,
             "semester": semester.value,
             "campus": campus_id.value,
@@ -149,32 +323,53 @@ class CourseTimetable:
             "start_time": "00:00",
             "end_time": "23:59"
         }
-        return requests.post(TIMETABLE_API_URL, data=data).json()
+
+    @classmethod
+    async def get_session(cls) -> aiohttp.ClientSession:
+        """Returns the shared client session, creating it if needed.
+
+        :rtype: aiohttp.ClientSession
+        """
+        if cls._session is None or cls._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=API_POOL_LIMIT,
+                keepalive_timeout=API_KEEPALIVE_TIMEOUT
+            )
+            timeout = aiohttp.ClientTimeout(total=API_TOTAL_TIMEOUT,
+                                            connect=API_CONNECT_TIMEOUT)
+            cls._session = aiohttp.ClientSession(connector=connector,
+                                                 timeout=timeout)
+        return cls._session
+
+    @classmethod
+    async def close_session(cls) -> None:
+        """Closes the shared client session, if one is open."""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
 
     def _linker(self) -> None:
-        """Finds grouped activities, inefficiently :), and writes them to
-        `self.activities`
+        """Finds grouped activities and writes them to `self.activities`.
+
+        Paired activities share a group code and only differ in the last
+        character of their activity code, e.g. "01-P1" and "01-P2", so they
+        are bucketed on both in one pass.
         """
-        for i, (main_key, main_value) in (
-                enumerate(self.get_activities().items())):
-            main_key = main_key.split("|")
+        pairs = {}
+        for activity in self.get_activities():
+            _, group_code, activity_code = activity.split("|")
             # -P signals that the activity should have a pair (for
             # generality I assume group, so more than 2, but I haven't seen
             # that yet).
-            if "-P" not in main_key[2]:
-                continue
+            if "-P" in activity_code:
+                pairs.setdefault((group_code, activity_code[:-1]),
+                                 []).append(activity)
 
-            for j, pair_key in enumerate(self.get_activities()):
-                split_pair_key = pair_key.split("|")
-                if (
-                        i == j or
-                        "-P" not in split_pair_key[2] or
-                        main_key[1] != split_pair_key[1]
-                ):
-                    continue
-
-                if main_key[2][:-1] == split_pair_key[2][:-1]:
-                    main_value["group"].append(pair_key)
+        acts = self.get_activities()
+        for paired in pairs.values():
+            for activity in paired:
+                acts[activity]["group"].extend(
+                    pair for pair in paired if pair != activity)
 
     def get_course_list(self) -> list[str]:
         return list(self.course_versions)
@@ -182,10 +377,35 @@ class CourseTimetable:
     def get_course(self) -> str:
         return self.course
 
+    def get_versions(self) -> dict[str, "CourseTimetable"]:
+        """Every course version in the response as its own course, e.g. a
+        request for semester ALL has a version per semester the course
+        runs in.
+
+        :return: Version key, e.g. "CSSE2010_S2_STLUC_IN", to course. The
+            selected version is this course.
+        :rtype: dict[str, CourseTimetable]
+        """
+        if self._versions is not None:
+            return self._versions
+
+        # The other versions' activities are reformatted in place, so the
+        # result is kept rather than being rebuilt on the next call.
+        self._versions = {
+            version: (self if course_data is self.course else
+                      self.from_version(version, course_data))
+            for version, course_data in self.course_versions.items()
+        }
+        return self._versions
+
     def get_activities(self) -> dict:
         """Activities refers to Lectures, Tutorials, etc."""
         return self.course.get("activities")
 
+    def get_activity_records(self) -> dict[str, Activity]:
+        """Same as `get_activities`, but as pre-parsed Activity records."""
+        return self._records
+
     def filter_activities(self,
                           activity_types: list[TTableInputs.ActivityTypes] |
                                           TTableInputs.ActivityTypes
@@ -211,13 +431,25 @@ class CourseTimetable:
             self._input_validation(activity_type=activity)
 
         acts = self.get_activities()
+        by_type = self._index["activity"]
 
         return {activity_type: [
             acts[activity]
-            for activity in acts
-            if acts[activity]["activity"] == activity_type.value
+            for activity in by_type.get(activity_type.value, [])
         ] for activity_type in activity_types}
 
+    def get_activities_by_day(self, day: str) -> list[dict]:
+        """Returns the activities on the given day, e.g. "Mon"."""
+        acts = self.get_activities()
+        return [acts[activity]
+                for activity in self._index["day"].get(day, [])]
+
+    def get_activities_by_group(self, group_code: str) -> list[dict]:
+        """Returns the activities in the given group, e.g. "PRA1"."""
+        acts = self.get_activities()
+        return [acts[activity]
+                for activity in self._index["group"].get(group_code, [])]
+
     def get_lectures(self) -> list[dict]:
         return self.filter_activities(
             TTableInputs.ActivityTypes.LEC).get(
@@ -249,41 +481,15 @@ class CourseTimetable:
             TTableInputs.ActivityTypes.DEL)
 
     def get_uncategorised(self) -> list[dict]:
-        acts = self.get_activities()
+        known_types = {activity_type.value for activity_type in
+                       TTableInputs.ActivityTypes.__members__.values()}
 
         return [
-            acts[activity]
-            for activity in acts
-            if (
-                       acts[activity] not in self.get_lectures()
-               ) and (
-                       acts[activity] not in self.get_tutorials()
-               ) and (
-                       acts[activity] not in self.get_practicals()
-               ) and (
-                       acts[activity] not in self.get_contacts()
-               ) and (
-                       acts[activity] not in self.get_workshops()
-               ) and (
-                       acts[activity] not in self.get_delayed()
-               )
+            activity
+            for activity in self.get_activities().values()
+            if activity["activity"] not in known_types
         ]
 
-    @staticmethod
-    def _get_shorter_schedule(first_act: dict[str, any],
-                              second_act: dict[str, any]):
-        if len(first_act.get("schedule")) <= len(second_act.get("schedule")):
-            return first_act, second_act
-        else:
-            return second_act, first_act
-
-    @staticmethod
-    def is_time_between(check_time, start_time, end_time):
-        check_datetime = dt.datetime.combine(dt.datetime.today(), check_time)
-        start_datetime = dt.datetime.combine(dt.datetime.today(), start_time)
-        end_datetime = dt.datetime.combine(dt.datetime.today(), end_time)
-        return start_datetime <= check_datetime <= end_datetime
-
     def get_overlap(self, first_course,
                     first_act: tuple[str, str],
                     second_course,
@@ -308,38 +514,15 @@ class CourseTimetable:
                              f"CourseTimetable, {type(first_course)=}, "
                              f"{type(second_course)=}")
 
-        act1 = first_course.get_activities().get(first_act)
-        act2 = second_course.get_activities().get(second_act)
+        act1 = first_course.get_activity_records().get(first_act)
+        act2 = second_course.get_activity_records().get(second_act)
 
-        if act1 is None and act2 is None:
+        if act1 is None or act2 is None:
             raise ValueError("One or both activities is not found within the"
                              f"course, {self.course=}, {first_act=}, "
                              f"{second_act=}")
 
-        act1, act2 = self._get_shorter_schedule(act1, act2)
-        act1_schedule, act2_schedule = (act1.get("schedule"),
-                                        act2.get("schedule"))
-
-        for i in range(len(act1_schedule)):
-            if act1_schedule[i] == act2_schedule[i]:
-                act1_start, act1_end = (
-                    dt.datetime.strptime(act1.get("start_time"),
-                                         DATETIME_FORMAT).time(),
-                    dt.datetime.strptime(act1.get("end_time"),
-                                         DATETIME_FORMAT).time()
-                )
-
-                act2_start, act2_end = (
-                    dt.datetime.strptime(act2.get("start_time"),
-                                         DATETIME_FORMAT).time(),
-                    dt.datetime.strptime(act2.get("end_time"),
-                                         DATETIME_FORMAT).time()
-                )
-
-                if (self.is_time_between(act2_start, act1_start, act1_end) or
-                        self.is_time_between(act2_end, act1_start, act1_end)):
-                    return True
-        return False
+        return act1.clashes_with(act2)
 
     def reformat_course_data(self):
         linker = False
@@ -366,6 +549,11 @@ class CourseTimetable:
             activity_data["start_time"] = start_time.strftime(DATETIME_FORMAT)
             activity_data["end_time"] = end_time.strftime(DATETIME_FORMAT)
             activity_data["group"] = []
+            # The weeks as a bitmask, so checking if two activities share a
+            # week is one AND. "schedule" is kept for display.
+            (activity_data["week_offset"],
+             activity_data["week_mask"]) = Activity.weeks_to_mask(
+                activity_data.get("schedule", []))
 
             # Flag to see if the linker needs to be used for this course.
             if not linker and "-P" in activity.split("|")[2]:
@@ -375,3 +563,23 @@ class CourseTimetable:
 
         if linker:
             self._linker()
+
+        self._build_index()
+
+    def _build_index(self) -> None:
+        """Indexes the activity keys by activity type, day and group code, so
+        the filter/get methods don't have to scan every activity. Also
+        builds the Activity records.
+        """
+        self._index = {"activity": {}, "day": {}, "group": {}}
+        self._records = {}
+
+        for activity, activity_data in self.get_activities().items():
+            self._records[activity] = Activity.from_dict(activity,
+                                                         activity_data)
+            self._index["activity"].setdefault(
+                activity_data["activity"], []).append(activity)
+            self._index["day"].setdefault(
+                activity_data["day"], []).append(activity)
+            self._index["group"].setdefault(
+                activity.split("|")[1], []).append(activity)
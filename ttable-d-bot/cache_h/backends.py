@@ -0,0 +1,40 @@
+import logging
+import os
+
+from constants.cogs import *
+from .store import CacheStore
+from .json_store import JsonCacheStore
+from .memory_store import MemoryCacheStore
+from .sqlite_store import SqliteCacheStore
+
+
+def open_cache_store(backend: str, base_files_path: str,
+                     logger: logging.Logger = None) -> CacheStore:
+    """Opens the cache store for the given backend.
+
+    :param backend: One of the keys of `CACHE_BACKENDS`.
+        :type backend: str.
+    :param base_files_path: The folder the cache file is kept in.
+        :type base_files_path: str.
+    :param logger: (Optional) The logger to use. If not provided, the
+        store's default logger is used.
+        :type logger: logging.Logger or None.
+    :return: The opened store, behind an in-memory tier unless
+        `CACHE_MEMORY_MAX_ENTRIES` is 0.
+        :rtype: CacheStore.
+    """
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend, {backend=}. Valid options "
+                         f"are {list(CACHE_BACKENDS)}")
+
+    store = {"sqlite": SqliteCacheStore,
+             "json": JsonCacheStore}[backend]
+    store = store(os.path.join(base_files_path, CACHE_BACKENDS[backend]),
+                  logger=logger, codec=CACHE_CODEC)
+
+    if CACHE_MEMORY_MAX_ENTRIES > 0:
+        store = MemoryCacheStore(store,
+                                 max_entries=CACHE_MEMORY_MAX_ENTRIES,
+                                 max_bytes=CACHE_MEMORY_MAX_BYTES,
+                                 logger=logger)
+    return store
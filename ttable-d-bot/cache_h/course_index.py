@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import Iterable
+
+from constants.cogs import *
+from json_h.read import JsonReader as jr
+from json_h.write import JsonWriter as jw
+
+
+class CourseIndex:
+    def __init__(self, file_path: str, logger: logging.Logger = None):
+        """
+        Initializes a CourseIndex instance.
+
+        Every course code that has been fetched, indexed by its n-grams so
+        that a mistyped code gets "did you mean" suggestions without a
+        request. Kept in memory and saved to a JSON file.
+
+        :param file_path: The path to the JSON file the codes are kept in.
+            :type file_path: str.
+        :param logger: (Optional) The logger to use.
+            :type logger: logging.Logger or None.
+        """
+        self.file_path = file_path
+        self.logger = logger
+        self._codes: set[str] = set()
+        self._ngrams: dict[str, set[str]] = {}
+        self._save_lock = asyncio.Lock()
+
+        if os.path.exists(file_path):
+            data = jr().extract_from_json_cache(file_path, logger=logger)
+            self.add((data or {}).get("codes", []))
+
+    def __contains__(self, code: str) -> bool:
+        return code.upper() in self._codes
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def add(self, codes: Iterable[str]) -> bool:
+        """
+        Adds course codes to the index.
+
+        :param codes: The course codes, e.g. "CSSE2010".
+            :type codes: Iterable[str].
+        :return: Whether any of the codes were new.
+            :rtype: bool.
+        """
+        added = False
+        for code in codes:
+            code = code.upper()
+            if code in self._codes:
+                continue
+            self._codes.add(code)
+            for ngram in self._split(code):
+                self._ngrams.setdefault(ngram, set()).add(code)
+            added = True
+        return added
+
+    def suggest(self, code: str, limit: int = SUGGESTION_LIMIT) -> list[str]:
+        """
+        Finds the known course codes closest to a (mistyped) code.
+
+        Codes sharing the most n-grams with it are candidates, which are
+        then ranked by edit distance. An edit changes at most n n-grams, so
+        codes sharing too few can't be close enough and aren't compared.
+
+        :param code: The course code, e.g. "CSSE2O10".
+            :type code: str.
+        :param limit: (Optional) The max number of suggestions.
+            :type limit: int.
+        :return: The closest codes, closest first, at most
+            `SUGGESTION_MAX_DISTANCE` edits away.
+            :rtype: list[str].
+        """
+        code = code.upper()
+        ngrams = self._split(code)
+        shared = Counter(candidate for ngram in ngrams
+                         for candidate in self._ngrams.get(ngram, ()))
+        min_shared = len(ngrams) - SUGGESTION_MAX_DISTANCE * SUGGESTION_NGRAM
+
+        ranked = []
+        for candidate, count in shared.most_common(SUGGESTION_CANDIDATES):
+            if count < min_shared:
+                break
+            if abs(len(candidate) - len(code)) > SUGGESTION_MAX_DISTANCE:
+                continue
+            distance = self._edit_distance(code, candidate,
+                                           SUGGESTION_MAX_DISTANCE)
+            if distance <= SUGGESTION_MAX_DISTANCE:
+                ranked.append((distance, candidate))
+        return [candidate for _, candidate in sorted(ranked)[:limit]]
+
+    async def async_save(self) -> None:
+        """Saves the codes, on a worker thread so the event loop isn't
+        blocked.
+        """
+        async with self._save_lock:
+            await jw().async_write(self.file_path,
+                                   {"codes": sorted(self._codes)},
+                                   logger=self.logger, backup=False)
+
+    @staticmethod
+    def _split(code: str) -> set[str]:
+        # Padded, so the start and end of a code are n-grams of their own.
+        padded = f"^{code}$"
+        return {padded[i:i + SUGGESTION_NGRAM]
+                for i in range(len(padded) - SUGGESTION_NGRAM + 1)}
+
+    @staticmethod
+    def _edit_distance(first: str, second: str, limit: int) -> int:
+        """Levenshtein distance, the number of single character inserts,
+        deletes and substitutions to turn one string into the other. Stops
+        early, returning `limit` + 1, once it must be more than `limit`.
+        """
+        previous = list(range(len(second) + 1))
+        for i, first_char in enumerate(first, start=1):
+            current = [i]
+            for j, second_char in enumerate(second, start=1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1,
+                                   previous[j - 1] +
+                                   (first_char != second_char)))
+            if min(current) > limit:
+                return limit + 1
+            previous = current
+        return previous[-1]
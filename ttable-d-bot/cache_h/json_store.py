@@ -0,0 +1,85 @@
+import logging
+import os
+from datetime import datetime
+
+from constants.common import *
+from json_h.read import JsonReader as jr
+from json_h.write import JsonWriter as jw
+from .store import CacheStore
+
+
+class JsonCacheStore(CacheStore):
+    def __init__(self, file_path: str, logger: logging.Logger = None,
+                 codec: str = "json"):
+        """
+        Initializes a JsonCacheStore instance.
+
+        Keeps every entry in a single JSON file. Lookups only read the entry
+        asked for, but every write rewrites the whole file. Kept for
+        compatibility, prefer `SqliteCacheStore`.
+
+        :param file_path: The path to the JSON file.
+            :type file_path: str.
+        :param logger: (Optional) The logger to use. If not provided, the
+            default logger is used.
+            :type logger: logging.Logger or None.
+        :param codec: (Optional) The name of the codec the file is written
+            with, a file written with any codec can be read. Defaults to
+            "json".
+            :type codec: str.
+        """
+        logging.basicConfig(level=logging.INFO,
+                            format=LOG_FORMAT)
+        self._logger = logger or logging.getLogger(__name__)
+
+        self.path = file_path
+        self.codec = codec
+        if not os.path.exists(file_path):
+            jw().clear_json(file_path, logger=self._logger, backup=False)
+
+    @staticmethod
+    def _is_expired(entry: dict, now: datetime) -> bool:
+        return (not entry.get("expires_at") or
+                datetime.fromisoformat(entry["expires_at"]) <= now)
+
+    def get_with_expiry(self, key: str, now: datetime | None = None
+                        ) -> tuple[dict, datetime] | None:
+        now = now or datetime.now()
+        entry = jr().read_key(self.path, key, logger=self._logger)
+
+        if entry is None or self._is_expired(entry, now):
+            return None
+        return entry["value"], datetime.fromisoformat(entry["expires_at"])
+
+    def set(self, key: str, value: dict, expires_at: datetime) -> None:
+        data = jr().extract_from_json_cache(self.path, logger=self._logger)
+        data[key] = {"value": value,
+                     "expires_at": expires_at.isoformat()}
+        jw().write(self.path, data, logger=self._logger, backup=False,
+                   codec=self.codec)
+
+    def delete(self, key: str) -> None:
+        data = jr().extract_from_json_cache(self.path, logger=self._logger)
+        if data.pop(key, None) is not None:
+            jw().write(self.path, data, logger=self._logger, backup=False,
+                       codec=self.codec)
+
+    def purge_expired(self, now: datetime | None = None) -> list[str]:
+        now = now or datetime.now()
+        data = jr().extract_from_json_cache(self.path, logger=self._logger)
+
+        expired = [key for key, entry in data.items()
+                   if self._is_expired(entry, now)]
+        for key in expired:
+            data.pop(key)
+
+        if expired:
+            jw().write(self.path, data, logger=self._logger, backup=False,
+                       codec=self.codec)
+        return expired
+
+    def clear(self, backup: bool = True) -> None:
+        jw().clear_json(self.path, logger=self._logger, backup=backup)
+
+    def size(self) -> int:
+        return os.path.getsize(self.path)
@@ -0,0 +1,133 @@
+import heapq
+import logging
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from constants.common import *
+from .store import CacheStore
+
+
+class MemoryCacheStore(CacheStore):
+    def __init__(self, backing: CacheStore, max_entries: int,
+                 max_bytes: int, logger: logging.Logger = None):
+        """
+        Initializes a MemoryCacheStore instance.
+
+        Keeps the most recently used entries in memory in front of a
+        persistent `backing` store. Writes go through to `backing`, reads
+        only touch it on a miss. Entries are evicted least recently used
+        first once either limit is passed.
+
+        Returned entries are shared with the in-memory copy, so must not be
+        modified.
+
+        :param backing: The persistent store.
+            :type backing: CacheStore.
+        :param max_entries: The max number of entries kept in memory.
+            :type max_entries: int.
+        :param max_bytes: The max total (serialised) size of the entries kept
+            in memory.
+            :type max_bytes: int.
+        :param logger: (Optional) The logger to use. If not provided, the
+            default logger is used.
+            :type logger: logging.Logger or None.
+        """
+        logging.basicConfig(level=logging.INFO,
+                            format=LOG_FORMAT)
+        self._logger = logger or logging.getLogger(__name__)
+
+        self.backing = backing
+        self.path = backing.path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (value, expires_at, size), least recently used first.
+        self._entries: OrderedDict[str, tuple[dict, datetime, int]] = (
+            OrderedDict())
+        self._bytes = 0
+        # (expires_at, key) ordered by expiry, so purging only looks at the
+        # entries that are due. Entries replaced or evicted since being
+        # pushed are skipped when popped.
+        self._expiry_heap: list[tuple[datetime, str]] = []
+        self._lock = threading.RLock()
+
+    def get_with_expiry(self, key: str, now: datetime | None = None
+                        ) -> tuple[dict, datetime] | None:
+        now = now or datetime.now()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    return entry[0], entry[1]
+                self._remove(key)
+
+        found = self.backing.get_with_expiry(key, now)
+        if found is not None:
+            self._insert(key, *found)
+        return found
+
+    def set(self, key: str, value: dict, expires_at: datetime) -> None:
+        self.backing.set(key, value, expires_at)
+        self._insert(key, value, expires_at)
+
+    def delete(self, key: str) -> None:
+        self.backing.delete(key)
+        with self._lock:
+            self._remove(key)
+
+    def purge_expired(self, now: datetime | None = None) -> list[str]:
+        now = now or datetime.now()
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, key = heapq.heappop(self._expiry_heap)
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] == expires_at:
+                    self._remove(key)
+        return self.backing.purge_expired(now)
+
+    def clear(self, backup: bool = True) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+        self.backing.clear(backup=backup)
+
+    def size(self) -> int:
+        return self.backing.size()
+
+    def close(self) -> None:
+        self.backing.close()
+
+    def _insert(self, key: str, value: dict, expires_at: datetime) -> None:
+        size = len(json.dumps(value))
+        with self._lock:
+            # Any older copy goes either way, so it can't shadow the new value.
+            self._remove(key)
+            if size > self.max_bytes:
+                self._logger.debug(f"Cache entry {key} is too big to keep "
+                                   f"in memory, {size} B.")
+                return
+
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+
+            while (len(self._entries) > self.max_entries or
+                   self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+            # Rebuilt once mostly made of skipped items, so it stays
+            # proportional to the number of entries.
+            if len(self._expiry_heap) > 2 * len(self._entries) + 64:
+                self._expiry_heap = [(entry[1], entry_key)
+                                     for entry_key, entry in
+                                     self._entries.items()]
+                heapq.heapify(self._expiry_heap)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
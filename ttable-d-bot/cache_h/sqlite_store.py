@@ -0,0 +1,149 @@
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+
+from constants.common import *
+from json_h.codec import decode, get_codec
+from .store import CacheStore
+
+
+class SqliteCacheStore(CacheStore):
+    def __init__(self, file_path: str, logger: logging.Logger = None,
+                 codec: str = "json"):
+        """
+        Initializes a SqliteCacheStore instance.
+
+        Every entry is a row keyed on the cache key, so lookups and inserts
+        only touch that row, and expiry times are kept in an indexed column.
+
+        :param file_path: The path to the database file, created if it
+            doesn't exist.
+            :type file_path: str.
+        :param logger: (Optional) The logger to use. If not provided, the
+            default logger is used.
+            :type logger: logging.Logger or None.
+        :param codec: (Optional) The name of the codec new entries are
+            written with, entries written with any codec can be read.
+            Defaults to "json".
+            :type codec: str.
+        """
+        logging.basicConfig(level=logging.INFO,
+                            format=LOG_FORMAT)
+        self._logger = logger or logging.getLogger(__name__)
+
+        self.path = file_path
+        self.codec = get_codec(codec)
+        # The connection is shared between threads, so access is serialised
+        # through the lock.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(file_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_expires_at "
+                "ON cache (expires_at)"
+            )
+
+    def get_with_expiry(self, key: str, now: datetime | None = None
+                        ) -> tuple[dict, datetime] | None:
+        now = now or datetime.now()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache "
+                "WHERE key = ? AND expires_at > ?",
+                (key, now.timestamp())
+            ).fetchone()
+
+        if row is None:
+            return None
+        try:
+            return decode(row[0]), datetime.fromtimestamp(row[1])
+        except ValueError as e:
+            self._logger.error(f"Error decoding cache entry {key}: {e}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: dict, expires_at: datetime) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, self.codec.encode(value), expires_at.timestamp())
+            )
+        self._logger.debug(f"Cache entry {key} written.")
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def purge_expired(self, now: datetime | None = None) -> list[str]:
+        now = now or datetime.now()
+        with self._lock, self._conn:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT key FROM cache WHERE expires_at <= ?",
+                (now.timestamp(),)
+            )]
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?",
+                               (now.timestamp(),))
+        return expired
+
+    def clear(self, backup: bool = True) -> None:
+        if backup:
+            self.backup()
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+        # Cheap with every row deleted, there's nothing left to copy.
+        with self._lock:
+            self._conn.execute("VACUUM")
+        self._logger.info(f"{os.path.basename(self.path)} cleared/reset.")
+
+    def backup(self, backup_folder: str = "backup") -> None:
+        """
+        Create a backup of the database.
+
+        :param backup_folder: The folder where backups will be stored.
+            Defaults to "backup".
+            :type backup_folder: str.
+        """
+        if not os.path.exists(backup_folder):
+            self._logger.warning(f"Backup folder '{backup_folder}' does not "
+                                 f"exist... Creating folder "
+                                 f"'{backup_folder}'")
+            os.makedirs(backup_folder)
+
+        backup_file_path = os.path.join(backup_folder,
+                                        f"{os.path.basename(self.path)}.bak")
+        # Copied through a separate read-only connection, not the shared one,
+        # so a big cache being backed up doesn't block reads and writes. WAL
+        # mode lets it read a consistent snapshot while they carry on.
+        source_uri = (f"{pathlib.Path(os.path.abspath(self.path)).as_uri()}"
+                      f"?mode=ro")
+        try:
+            with (closing(sqlite3.connect(source_uri, uri=True)) as source,
+                  closing(sqlite3.connect(backup_file_path)) as dest):
+                source.backup(dest)
+            self._logger.info(f"Backup created: {backup_file_path}")
+        except Exception as e:
+            self._logger.error(f"Error creating backup: {e}")
+
+    def size(self) -> int:
+        with self._lock:
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,73 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+
+class CacheStore(ABC):
+    """Keyed store for API responses.
+
+    Entries are stored alongside the time they expire at, expired entries
+    are treated as missing. Cogs only use this interface, so backends can
+    be swapped through `CACHE_BACKEND`.
+    """
+    path: str
+
+    def get(self, key: str, now: datetime | None = None) -> dict | None:
+        """Returns the entry stored under `key`, or None if there is no entry
+        or it has expired.
+
+        :param key: The cache key, e.g. "CSSE2010_S2_STLUC".
+            :type key: str.
+        :param now: (Optional) The time to check expiry against. Defaults to
+            the current time.
+            :type now: datetime or None.
+        :return: The stored entry, or None.
+            :rtype: dict or None.
+        """
+        found = self.get_with_expiry(key, now)
+        return None if found is None else found[0]
+
+    @abstractmethod
+    def get_with_expiry(self, key: str, now: datetime | None = None
+                        ) -> tuple[dict, datetime] | None:
+        """Same as `get`, but also returns when the entry expires.
+
+        :rtype: tuple[dict, datetime] or None.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: dict, expires_at: datetime) -> None:
+        """Inserts or replaces the entry stored under `key`.
+
+        :param key: The cache key, e.g. "CSSE2010_S2_STLUC".
+            :type key: str.
+        :param value: The entry to store, must be JSON serialisable.
+            :type value: dict.
+        :param expires_at: When the entry stops being served.
+            :type expires_at: datetime.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Removes the entry stored under `key`, if there is one."""
+
+    @abstractmethod
+    def purge_expired(self, now: datetime | None = None) -> list[str]:
+        """Removes every expired entry.
+
+        :param now: (Optional) The time to check expiry against. Defaults to
+            the current time.
+            :type now: datetime or None.
+        :return: The keys that were removed.
+            :rtype: list[str].
+        """
+
+    @abstractmethod
+    def clear(self, backup: bool = True) -> None:
+        """Removes every entry, optionally creating a backup first."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Returns the size of the store in bytes."""
+
+    def close(self) -> None:
+        """Releases any resources held by the store."""
@@ -1,18 +1,29 @@
+import aiohttp
+import asyncio
 import discord
 import logging
 import os
 import re
+import threading
 
-from time import perf_counter_ns
+from time import monotonic, perf_counter_ns
 from discord.ext import commands, tasks
 from datetime import datetime, timedelta
 
-from api.timetable_api_calls import CourseTimetable
+from api.timetable_api_calls import CourseTimetable, EmptyResponseError
+from api.ingest import ingest_prefixes
+from api.single_flight import SingleFlight
 from api.TTableInputs import TTableInputs
 
+from cache_h.backends import open_cache_store
+from cache_h.course_index import CourseIndex
+
 from json_h.read import JsonReader as jr
 from json_h.write import JsonWriter as jw
 
+from cop import Solver
+
+from constants.api import DAY_NAMES
 from constants.cogs import *
 from constants.common import *
 
@@ -29,11 +40,29 @@ class BaseCog(commands.Cog):
         self.bot = bot
 
         base_files_path = os.path.join(os.getcwd(), BASE_FILES_DIR)
-        cache_path = os.path.join(base_files_path, API_CACHE_NAME)
         admin_path = os.path.join(base_files_path, ADMIN_STORE_NAME)
 
-        self.paths = {"cache": cache_path,
-                      "admin": admin_path}
+        self.cache = open_cache_store(CACHE_BACKEND, base_files_path,
+                                      logger=logger)
+
+        self.known_courses = CourseIndex(
+            os.path.join(base_files_path, KNOWN_COURSES_NAME), logger=logger)
+
+        self.paths = {"cache": self.cache.path,
+                      "admin": admin_path,
+                      "known_courses": self.known_courses.file_path}
+
+        # Cache misses for the same course are coalesced into one API call.
+        self._course_requests = SingleFlight()
+        # Course key -> background refresh of its stale cache entry, also
+        # keeps the task referenced so it isn't garbage collected. And when
+        # each course's last refresh failed.
+        self._refreshes: dict[str, asyncio.Task] = {}
+        self._refresh_failures: dict[str, datetime] = {}
+        # User ID -> cancel event of their running build-timetable search.
+        # Also set on unload, which `_unloading` tells apart.
+        self._timetable_jobs: dict[int, threading.Event] = {}
+        self._unloading = False
 
         self.default_act_cats = [
             "activity", "day", "location", "start_time", "end_time",
@@ -44,12 +73,23 @@ class BaseCog(commands.Cog):
     async def on_ready(self):
         logger.info(f"{self.__class__.__name__} cog is ready.")
         self.check_cache.start()
+        self.scheduled_ingest.start()
 
     @commands.Cog.listener()
     async def on_shutdown(self):
         logger.info(f"{self.__class__.__name__} cog shutting down. Stopping "
                     f"periodic tasks.")
         self.check_cache.stop()
+        self.scheduled_ingest.stop()
+
+    async def cog_unload(self) -> None:
+        self._unloading = True
+        for cancel in self._timetable_jobs.values():
+            cancel.set()
+        for refresh in list(self._refreshes.values()):
+            refresh.cancel()
+        await CourseTimetable.close_session()
+        self.cache.close()
 
     @commands.command(name="ping", help="Ping the bot")
     async def ping(self, ctx):
@@ -76,10 +116,14 @@ class BaseCog(commands.Cog):
             course, semester, campus, *optional = (match[0] or match[1]
                                                    for match in matches)
         try:
-            course_activities = self.get_course_activities(course, semester,
-                                                           campus)
+            course_activities = await self.get_course_activities(course,
+                                                                 semester,
+                                                                 campus)
         except ValueError as e:
-            await ctx.send(embed=self.display_activities_command_error(ctx))
+            embed = self.display_activities_command_error(ctx)
+            if isinstance(e, EmptyResponseError):
+                self.add_course_suggestions(embed, [course])
+            await ctx.send(embed=embed)
             return
 
         # https://stackoverflow.com/questions/312443/how-do-i-split-a-list-into-equally-sized-chunks
@@ -133,62 +177,314 @@ class BaseCog(commands.Cog):
         )
         return embed
 
+    @commands.command(name="build-timetable",
+                      help="Build the best timetable for a set of courses")
+    async def build_timetable(self, ctx):
+        args = ctx.message.content.removeprefix(
+            f"{self.bot.command_prefix}{ctx.command.name}"
+        ).strip()
+
+        options = dict(re.findall(r'-(\w+)\s+([^\s-][^\s]*)', args))
+        flags = re.findall(r'--(\w+)', args)
+        if not {"cs", "s", "c"} <= options.keys():
+            await ctx.send(embed=self.build_timetable_command_error(ctx))
+            return
+        courses = list(dict.fromkeys(options["cs"].upper().split(",")))
+        semester, campus = options["s"], options["c"]
+        preferences = {TIMETABLE_PREFERENCE_FLAGS[flag]: {} for flag in flags
+                       if flag in TIMETABLE_PREFERENCE_FLAGS}
+
+        # A new request from the same user replaces their previous one.
+        previous = self._timetable_jobs.get(ctx.author.id)
+        if previous is not None:
+            previous.set()
+        cancel = threading.Event()
+        self._timetable_jobs[ctx.author.id] = cancel
+
+        title = f"Timetable for {', '.join(courses)}"
+        message = await ctx.send(embed=discord.Embed(
+            title=title,
+            description="Fetching courses...",
+            colour=discord.Colour.dark_magenta()
+        ))
+        try:
+            course_objs = await asyncio.gather(
+                *(self.get_course_timetable(course, semester, campus)
+                  for course in courses)
+            )
+            await self._run_timetable_search(message, title, course_objs,
+                                             preferences, cancel)
+        except ValueError as e:
+            embed = self.build_timetable_command_error(ctx)
+            if isinstance(e, EmptyResponseError):
+                self.add_course_suggestions(embed, courses)
+            await message.edit(embed=embed)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Fetching {', '.join(courses)} failed: {e!r}")
+            await message.edit(embed=discord.Embed(
+                title=title,
+                description="Couldn't fetch the courses, try again later.",
+                colour=discord.Colour.red()
+            ))
+        finally:
+            if self._timetable_jobs.get(ctx.author.id) is cancel:
+                self._timetable_jobs.pop(ctx.author.id)
+
+    async def _run_timetable_search(self, message, title, course_objs,
+                                    preferences, cancel):
+        records = {key: record for course_obj in course_objs
+                   for key, record
+                   in course_obj.get_activity_records().items()}
+        deadline = monotonic() + TIMETABLE_TIME_BUDGET
+        progress = {}
+
+        def stop():
+            return cancel.is_set() or monotonic() > deadline
+
+        def on_improve(score, timetable):
+            # Called from the search's thread, read by the loop below.
+            progress["best"] = (score, timetable)
+
+        # The search is CPU bound, so it runs on a worker thread and the
+        # event loop only wakes up to show the best timetable so far.
+        search = asyncio.ensure_future(asyncio.to_thread(
+            self._search_timetable, course_objs, preferences, stop,
+            on_improve))
+        shown = None
+        while not search.done():
+            await asyncio.wait({search}, timeout=TIMETABLE_UPDATE_INTERVAL)
+            best = progress.get("best")
+            if best is not shown and not search.done():
+                shown = best
+                await message.edit(embed=self.timetable_embed(
+                    title, "Searching, best so far:", best, records))
+
+        ranked = search.result()
+        if cancel.is_set():
+            reason = ("The bot is shutting down"
+                      if self._unloading else "Cancelled by a newer request")
+            await message.edit(embed=self.timetable_embed(
+                title, f"{reason}, best found:",
+                progress.get("best"), records, discord.Colour.orange()))
+        elif not ranked and monotonic() > deadline:
+            await message.edit(embed=discord.Embed(
+                title=title,
+                description="Time budget reached before any timetable "
+                            "was found.",
+                colour=discord.Colour.orange()
+            ))
+        elif not ranked:
+            await message.edit(embed=discord.Embed(
+                title=title,
+                description="No timetable without clashes exists.",
+                colour=discord.Colour.red()
+            ))
+        else:
+            description = ("Time budget reached, best found:"
+                           if monotonic() > deadline else "Best timetable:")
+            await message.edit(embed=self.timetable_embed(
+                title, description, ranked[0], records,
+                discord.Colour.green()))
+
+    @staticmethod
+    def _search_timetable(course_objs, preferences, stop, on_improve):
+        solver = Solver(course_objs)
+        if not preferences:
+            # Every timetable scores 0, so the first one found is the best.
+            return [(0.0, timetable)
+                    for timetable in solver.solve(limit=1, stop=stop)]
+
+        best = {}
+
+        def improved(score, timetable):
+            best["score"] = score
+            on_improve(score, timetable)
+
+        # Penalties are never negative, so nothing beats a score of 0.
+        return solver.rank(preferences, k=1, on_improve=improved,
+                           stop=lambda: best.get("score", -1) >= 0 or stop())
+
+    def timetable_embed(self, title, description, best, records,
+                        colour=discord.Colour.dark_magenta()):
+        embed = discord.Embed(title=title, description=description,
+                              colour=colour)
+        if best is None:
+            embed.description = f"{description} nothing yet."
+            return embed
+
+        score, timetable = best
+        courses = {}
+        for variable, alternative in sorted(timetable.items()):
+            course = variable.split("|")[0]
+            for key in alternative:
+                courses.setdefault(course, []).append(
+                    self.format_activity_record(records[key]))
+        for course, lines in courses.items():
+            embed.add_field(name=course, value="\n".join(lines),
+                            inline=False)
+        embed.set_footer(text=f"Score: {score or 0:g}")  # No "-0"
+        return embed
+
+    @staticmethod
+    def format_activity_record(record):
+        return (f"- {record.group} {record.code}: {DAY_NAMES[record.day]} "
+                f"{record.start // 60:02}:{record.start % 60:02}-"
+                f"{record.end // 60:02}:{record.end % 60:02}")
+
+    def build_timetable_command_error(self, ctx):
+        message = ("Given inputs are invalid!\n"
+                   f"`{self.bot.command_prefix}"
+                   f"{self.build_timetable.name} "
+                   "-cs <course code>,<course code>... -s <semester> "
+                   "-c <campus> "
+                   f"[{' '.join(f'--{flag}' for flag in TIMETABLE_PREFERENCE_FLAGS)}]`\n"
+                   "Order does **_not_** matter")
+        embed = discord.Embed(
+            title=f"Command ERROR - {ctx.command.name}",
+            description=message,
+            colour=discord.Colour.red())
+        embed.add_field(
+            name="**<course code>**",
+            value="As an example, CSSE2010,CSSE2002"
+        )
+        embed.add_field(
+            name="**<semester>**",
+            value="\n".join(f"- {semester}"
+                            for semester in
+                            TTableInputs.Semester.__members__.values())
+        )
+        embed.add_field(
+            name="**<campus>**",
+            value="\n".join(f"- {campus}"
+                            for campus in
+                            TTableInputs.Campus.__members__.values())
+        )
+        embed.add_field(
+            name="**[flags]**",
+            value="- --early: avoid classes before 9 am\n"
+                  "- --hours: avoid long days"
+        )
+        return embed
+
+    def add_course_suggestions(self, embed, courses):
+        """Adds "did you mean" suggestions for the given course codes that
+        aren't known."""
+        suggestions = []
+        for course in courses:
+            if course in self.known_courses:
+                continue
+            matches = self.known_courses.suggest(course)
+            if matches:
+                suggestions.append(f"- {course}: {', '.join(matches)}")
+        if suggestions:
+            embed.add_field(name="**Did you mean**",
+                            value="\n".join(suggestions), inline=False)
+
     @commands.command(name="clear-cache",
                       help="Clear the cache")
     @commands.check(is_allowed_account)
     async def clear_cache_command(self, ctx):
-        jw().clear_json(self.paths["cache"], logger=logger)
+        self.cache.clear()
         embed = discord.Embed(
             title=f"`{os.path.basename(self.paths["cache"])}` cleared",
             colour=discord.Colour.green()
         )
         await ctx.send(embed=embed)
 
+    @commands.command(name="ingest-cache",
+                      help="Fetch every course of the given faculties "
+                           "(default all) into the cache")
+    @commands.check(is_allowed_account)
+    async def ingest_cache_command(self, ctx, *faculties):
+        unknown = [faculty for faculty in faculties
+                   if faculty not in INGEST_PREFIXES]
+        if unknown:
+            embed = discord.Embed(
+                title=f"Command ERROR - {ctx.command.name}",
+                description=f"Unknown faculties: {', '.join(unknown)}\n"
+                            f"Valid options are "
+                            f"{', '.join(INGEST_PREFIXES)}",
+                colour=discord.Colour.red())
+            await ctx.send(embed=embed)
+            return
+
+        results = await self.ingest(list(faculties) or list(INGEST_PREFIXES))
+        stored = sum(result for result in results.values()
+                     if isinstance(result, int))
+        embed = discord.Embed(
+            title="Cache ingest complete",
+            description=f"{stored} course versions cached.",
+            colour=discord.Colour.green()
+        )
+        failed = [prefix for prefix, result in results.items()
+                  if isinstance(result, Exception)]
+        if failed:
+            embed.colour = discord.Colour.orange()
+            embed.add_field(name="**Failed prefixes**",
+                            value=", ".join(failed))
+        await ctx.send(embed=embed)
+
+    @tasks.loop(time=INGEST_TIME)
+    async def scheduled_ingest(self):
+        # Runs nightly while traffic is low, but only ingests every
+        # INGEST_INTERVAL_DAYS, the cache keeps entries fresh in between.
+        admin_data = await asyncio.to_thread(
+            jr().extract_from_json_cache, self.paths["admin"], logger=logger)
+        admin_data = admin_data or {}
+        last_ingest = admin_data.get("last-ingest-date")
+        if (last_ingest is not None and
+                datetime.now() - datetime.fromisoformat(last_ingest) <
+                timedelta(days=INGEST_INTERVAL_DAYS)):
+            return
+
+        results = await self.ingest(list(INGEST_PREFIXES))
+        if all(isinstance(result, Exception) for result in results.values()):
+            return  # Most likely the API is down, so try again tomorrow.
+        admin_data["last-ingest-date"] = datetime.now().isoformat()
+        await jw().async_write(self.paths["admin"], admin_data,
+                               logger=logger, backup=False)
+
+    async def ingest(self, faculties: list[str]):
+        """Fetches every course of the given faculties, by their
+        `INGEST_PREFIXES`, into the cache."""
+        prefixes = [prefix for faculty in faculties
+                    for prefix in INGEST_PREFIXES[faculty]]
+        logger.info(f"Ingesting {len(prefixes)} prefixes for "
+                    f"{', '.join(faculties)}...")
+        return await ingest_prefixes(
+            prefixes, self._store_ingested,
+            semester=TTableInputs.Semester[INGEST_SEMESTER],
+            campus_id=TTableInputs.Campus[INGEST_CAMPUS]
+        )
+
+    async def _store_ingested(self, versions):
+        # A prefix can have hundreds of versions, so they're written on a
+        # worker thread.
+        await asyncio.to_thread(self._store_versions, versions,
+                                datetime.now())
+        await self._add_known_courses(versions)
+
     # 1 MINUTE FOR TESTING - 24 HOURS FOR FINAL (as a minimum)
     @tasks.loop(minutes=1)
     async def check_cache(self):
-        admin_data = jr().extract_from_json_cache(self.paths["admin"],
-                                                  logger=logger)
+        # Disk work runs on a worker thread so the event loop isn't blocked.
+        await asyncio.to_thread(self._sweep_cache)
 
-        file_size_gb = os.path.getsize(self.paths["cache"]) / (1024 ** 3)
+    def _sweep_cache(self) -> None:
+        file_size_gb = self.cache.size() / (1024 ** 3)
         if file_size_gb > CACHE_MAX_SIZE:
             logger.info("Cache size is greater than threshold, "
                         f"{file_size_gb} GB > {CACHE_MAX_SIZE} GB, "
                         "clearing cache...")
-            jw().clear_json(self.paths["cache"],
-                            logger=logger,
-                            backup=(file_size_gb <
-                                    CACHE_MAX_SIZE * CACHE_MAX_SIZE_MULT))
+            self.cache.clear(backup=(file_size_gb <
+                                     CACHE_MAX_SIZE * CACHE_MAX_SIZE_MULT))
             logger.info("Cache check complete.")
             return
 
-        check_date = datetime.now()
-        if (not admin_data.get("last_check_date") or
-                check_date - datetime.fromisoformat(admin_data.get(
-                    "last_check_date")) >= timedelta(
-                    days=1)):
-            logger.info("Checking cache...")
-            cache_data = jr().extract_from_json_cache(self.paths["cache"],
-                                                      logger=logger)
-
-            items_to_remove = []
-            for key, value in cache_data.items():
-                if (not value.get("request_date") or
-                        check_date - datetime.fromisoformat(value.get(
-                            "request_date")) >= timedelta(
-                            days=7)):
-                    items_to_remove.append(key)
-            for item in items_to_remove:
-                cache_data.pop(item)
-                logger.info(f"Cache data for {item} removed.")
-
-            jw().write(self.paths["cache"], cache_data, logger=logger,
-                       backup=False)
-
-            admin_data["last_check_date"] = check_date.isoformat()
-            jw().write(self.paths["admin"], admin_data, logger=logger)
-
-            logger.info("Cache check complete.")
+        # Expired entries are found through the expiry index, so this only
+        # costs as much as the number of entries due.
+        for item in self.cache.purge_expired(datetime.now()):
+            logger.info(f"Cache data for {item} removed.")
 
     def format_activity_data(self, data, optional):
         message = []
@@ -214,25 +510,127 @@ class BaseCog(commands.Cog):
             )
         return "\n".join(message)
 
-    def get_course_activities(self, course: str, semester: str, campus: str):
-        cache_data = jr().extract_from_json_cache(self.paths["cache"],
-                                                  logger=logger)
+    async def get_course_activities(self, course: str, semester: str,
+                                    campus: str):
+        course_key = f"{course}_{semester}_{campus}"
 
+        cache_entry = self._get_cached(course, semester, campus)
+        if cache_entry is not None:
+            return cache_entry["course"]["activities"]
+
+        course_obj = await self._course_requests.do(
+            course_key,
+            lambda: self._request_course(course, semester, campus)
+        )
+        return course_obj.get_activities()
+
+    def _get_cached(self, course: str, semester: str, campus: str):
+        """Returns the cache entry for a course, or None if there isn't one.
+
+        Entries are fresh for CACHE_TTL_DAYS. After that they're stale, but
+        still returned (until they expire after CACHE_HARD_TTL_DAYS) while a
+        refresh runs in the background, so callers never wait on the API
+        for a course that's cached.
+        """
+        for cache_key in self._cache_keys(course, semester, campus):
+            cache_entry = self.cache.get(cache_key)
+            if cache_entry is not None:
+                break
+        else:
+            return None
+
+        if cache_entry.get("empty"):
+            # Cached so a mistyped course doesn't go to the API every retry.
+            err_msg = f"API call for {cache_key} returned empty recently."
+            logger.info(err_msg)
+            raise EmptyResponseError(err_msg)
+
+        now = datetime.now()
+        request_date = datetime.fromisoformat(cache_entry["request_date"])
+        if now - request_date > timedelta(days=CACHE_TTL_DAYS):
+            self._refresh(course, semester, campus, now)
+        return cache_entry
+
+    @staticmethod
+    def _cache_keys(course: str, semester: str, campus: str) -> list[str]:
+        """The cache keys that can answer a request, in the order to try.
+
+        Every course version in a response is cached under its own key, e.g.
+        "CSSE2010_S2_STLUC_IN", so a request for one semester and campus is
+        answered by any response that had its internal version, including
+        one for "CSSE2010_ALL_ALL". Only requests for ALL, or whose version
+        wasn't in the response, are cached under the request's own key.
+        """
         course_key = f"{course}_{semester}_{campus}"
+        if TTableInputs.Semester.ALL.value in (semester, campus):
+            return [course_key]
+        return [f"{course_key}_{TTableInputs.Form.IN}", course_key]
 
-        if (course_key in cache_data and
-                "request_date" in cache_data[course_key]):
-            request_date = datetime.fromisoformat(
-                cache_data[course_key]["request_date"]
+    def _refresh(self, course: str, semester: str, campus: str,
+                 now: datetime) -> None:
+        course_key = f"{course}_{semester}_{campus}"
+        last_failure = self._refresh_failures.get(course_key)
+        if (course_key in self._refreshes or
+                self._course_requests.in_flight(course_key) or
+                last_failure is not None and
+                now - last_failure < timedelta(
+                    seconds=CACHE_REFRESH_RETRY_SECONDS)):
+            return
+
+        logger.info(f"Cache data for {course_key} is stale, refreshing.")
+        refresh = asyncio.ensure_future(self._course_requests.do(
+            course_key,
+            lambda: self._request_course(course, semester, campus)
+        ))
+        self._refreshes[course_key] = refresh
+
+        def done(task: asyncio.Task) -> None:
+            self._refreshes.pop(course_key, None)
+            if task.cancelled():
+                return
+            if task.exception() is not None:
+                logger.warning(f"Refreshing {course_key} failed, serving "
+                               f"stale data: {task.exception()!r}")
+                self._refresh_failures[course_key] = datetime.now()
+            else:
+                self._refresh_failures.pop(course_key, None)
+
+        refresh.add_done_callback(done)
+
+    async def get_course_timetable(self, course: str, semester: str,
+                                   campus: str) -> CourseTimetable:
+        """Same as `get_course_activities`, but returns the CourseTimetable,
+        e.g. for the solver. Cached courses are rebuilt without a request."""
+        cache_entry = self._get_cached(course, semester, campus)
+        if cache_entry is not None:
+            return CourseTimetable.from_cached(
+                cache_entry["course"], course,
+                semester=TTableInputs.convert(semester),
+                campus_id=TTableInputs.convert(campus),
+                form_type=TTableInputs.Form.IN
             )
-            now = datetime.now()
 
-            date_difference = now - request_date
-            if date_difference < timedelta(days=7):
-                return cache_data[course_key]["course"]["activities"]
+        course_key = f"{course}_{semester}_{campus}"
+        return await self._course_requests.do(
+            course_key,
+            lambda: self._request_course(course, semester, campus)
+        )
+
+    async def _request_course(self, course: str, semester: str,
+                              campus: str) -> CourseTimetable:
+        course_key = f"{course}_{semester}_{campus}"
 
         start = perf_counter_ns()
-        course_obj = self.get_course_obj(course, semester, campus)
+        try:
+            course_obj = await self.get_course_obj(course, semester, campus)
+        except EmptyResponseError:
+            request_date = datetime.now()
+            self.cache.set(course_key, {
+                "empty": True,
+                "request_date": request_date.isoformat()
+            }, expires_at=request_date + timedelta(
+                minutes=NEGATIVE_CACHE_TTL_MINUTES))
+            raise
         duration = round((perf_counter_ns() - start) / 1000000, 5)
         if duration < 5000:
             logger.debug(f"API call made, {duration} ms.")
@@ -240,23 +638,46 @@ class BaseCog(commands.Cog):
             logger.warning("API call took longer than "
                            f"{API_CALL_TIME_WARN} ms, {duration} ms")
 
-        cache_data[course_key] = {
-            "course": course_obj.get_course(),
-            "request_date": datetime.now().isoformat()
-        }
+        request_date = datetime.now()
+        versions = course_obj.get_versions()
+        self._store_versions(versions, request_date)
 
-        jw().write(self.paths["cache"], cache_data, logger=logger, backup=False)
-        return course_obj.get_activities()
+        if self._cache_keys(course, semester, campus)[0] not in versions:
+            self.cache.set(course_key, {
+                "course": course_obj.get_course(),
+                "request_date": request_date.isoformat()
+            }, expires_at=request_date + timedelta(days=CACHE_HARD_TTL_DAYS))
+
+        await self._add_known_courses(versions)
+        return course_obj
+
+    def _store_versions(self, versions: dict[str, CourseTimetable],
+                        request_date: datetime) -> None:
+        """Caches each course version under its version key, see
+        `_cache_keys`."""
+        expires_at = request_date + timedelta(days=CACHE_HARD_TTL_DAYS)
+        for version, version_obj in versions.items():
+            self.cache.set(version, {
+                "course": version_obj.get_course(),
+                "request_date": request_date.isoformat()
+            }, expires_at=expires_at)
+
+    async def _add_known_courses(self, versions: dict[str, CourseTimetable]
+                                 ) -> None:
+        if self.known_courses.add(version.split("_")[0]
+                                  for version in versions):
+            await self.known_courses.async_save()
 
     @staticmethod
-    def get_course_obj(course: str, semester: str, campus: str):
+    async def get_course_obj(course: str, semester: str, campus: str):
         (semester, campus, form) = (
             TTableInputs.convert(semester),
             TTableInputs.convert(campus),
             TTableInputs.Form.IN
         )
-        course_obj = CourseTimetable(course, semester=semester,
-                                     campus_id=campus, form_type=form)
+        course_obj = await CourseTimetable.create(course, semester=semester,
+                                                  campus_id=campus,
+                                                  form_type=form)
 
         return course_obj
 
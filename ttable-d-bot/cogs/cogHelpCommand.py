@@ -11,7 +11,7 @@ logger = logging.getLogger(__name__)
 class HelpCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.excluded_commands = ["clear-cache"]
+        self.excluded_commands = ["clear-cache", "ingest-cache"]
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -1,5 +1,12 @@
 TIMETABLE_API_URL = "https://timetable.my.uq.edu.au/odd/rest/timetable/subjects"
+API_TOTAL_TIMEOUT = 30  # Seconds before a request to the API is abandoned
+API_CONNECT_TIMEOUT = 10  # Seconds allowed to establish a connection
+API_POOL_LIMIT = 20  # Max simultaneous connections in the shared pool
+API_KEEPALIVE_TIMEOUT = 60  # Seconds an idle connection is kept open
+API_MAX_CONCURRENCY = 6  # Default max requests in flight for a batch
+INGEST_CONCURRENCY = 2  # Max prefix requests in flight, their responses are big
 DATETIME_FORMAT = "%H:%M"
+DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
 KEY_MAPPINGS = {
     "activity_type": "activity",
     "day_of_week": "day",
@@ -1,10 +1,49 @@
+from datetime import time, timedelta, timezone
+
+from constants.solver import EARLY_CLASS_REWARD, DAILY_HOURS_REWARD
+
 BASE_FILES_DIR = "base-files"
 API_CACHE_NAME = "api-calls-cache.json"
+API_CACHE_DB_NAME = "api-calls-cache.sqlite3"
+CACHE_BACKENDS = {"sqlite": API_CACHE_DB_NAME,  # Backend name to file name
+                  "json": API_CACHE_NAME}
+CACHE_BACKEND = "sqlite"
+CACHE_CODEC = "zlib"  # "json", "zlib" or "lzma", old entries are still read
+CACHE_TTL_DAYS = 7  # Days an API response is fresh, after which it's refreshed
+CACHE_HARD_TTL_DAYS = 28  # Days a stale response is served while refreshing
+CACHE_REFRESH_RETRY_SECONDS = 300  # Wait after a failed refresh to try again
+CACHE_MEMORY_MAX_ENTRIES = 256  # Entries kept in memory, 0 to disable
+CACHE_MEMORY_MAX_BYTES = 64 * 1024 ** 2  # Bytes kept in memory
 ADMIN_STORE_NAME = "admin.json"
+KNOWN_COURSES_NAME = "known-courses.json"  # Every course code ever fetched
+NEGATIVE_CACHE_TTL_MINUTES = 60  # Minutes an empty API response is cached
+SUGGESTION_LIMIT = 3  # Max "did you mean" suggestions for a course code
+SUGGESTION_MAX_DISTANCE = 2  # Max edits between a code and a suggestion
+SUGGESTION_CANDIDATES = 50  # Codes sharing the most n-grams that are ranked
+SUGGESTION_NGRAM = 3  # Length of the n-grams course codes are indexed by
 CACHE_MAX_SIZE = 1.5  # giga bytes
 CACHE_MAX_SIZE_MULT = 10  # If the cache is bigger than CACHE_MAX_SIZE *
                           # CACHE_MAX_SIZE_MULT no backup is saved.
 
+TIMETABLE_TIME_BUDGET = 30  # Seconds a build-timetable search may run for
+TIMETABLE_UPDATE_INTERVAL = 2  # Seconds between edits showing the best so far
+TIMETABLE_PREFERENCE_FLAGS = {"early": EARLY_CLASS_REWARD,  # Flag to reward ID
+                              "hours": DAILY_HOURS_REWARD}
+
+# Course code prefixes whose courses are all fetched by the bulk ingest, one
+# request per prefix, by faculty.
+INGEST_PREFIXES = {
+    "EAIT": ["CSSE", "COMP", "INFS", "DECO", "ENGG", "ELEC", "METR", "MECH",
+             "CIVL", "CHEE"],
+    "Science": ["MATH", "STAT", "PHYS", "CHEM", "BIOL", "BIOM", "SCIE"],
+    "BEL": ["ECON", "ACCT", "FINM", "MGTS", "LAWS"],
+    "HASS": ["PSYC", "PHIL", "HIST", "WRIT"],
+}
+INGEST_SEMESTER = "ALL"  # Semester the bulk ingest requests
+INGEST_CAMPUS = "ALL"  # Campus the bulk ingest requests
+INGEST_TIME = time(hour=3, tzinfo=timezone(timedelta(hours=10)))  # 3 am AEST
+INGEST_INTERVAL_DAYS = 6  # Days between scheduled ingests, less than the TTL
+
 API_CALL_TIME_WARN = 5000  # Time in ms for the console to warn about an API
                            # call taking too long
 
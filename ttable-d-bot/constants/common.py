@@ -1,3 +1,4 @@
 LOG_FORMAT = "[%(asctime)s] [%(levelname)-8s] %(name)s: %(message)s"
 PY_FILE_EXTENSION = ".py"
 COG_PRE = "cog"
+JSON_INDEX_SUFFIX = ".idx"
@@ -0,0 +1,12 @@
+SLOT_MINUTES = 15  # Granularity of the solver's time slot bitmasks
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Reward function IDs, see rewards.REWARDS
+EARLY_CLASS_REWARD = 0  # Penalises classes starting too early
+DAILY_HOURS_REWARD = 1  # Penalises days with too many hours of class
+BLOCKED_TIME_REWARD = 2  # Penalises classes in user given time windows
+
+EARLY_CLASS_START = 9 * 60  # Minutes since midnight, classes before are early
+MAX_DAILY_MINUTES = 6 * 60  # Minutes of class in a day before it's too many
+DEFAULT_TOP_K = 10  # Timetables kept when ranking
+SOLVER_PARTITIONS_PER_WORKER = 4  # Subtrees per process when ranking in parallel
@@ -1,86 +1,629 @@
 """
-TO DO:
-Implement 4 methods
+Timetable constraint solver.
+
 process_conditions: process the timetable into a group of hard constraints
+    - Variables are the activity groups, e.g. 'CSSE2010-S2-STLUC-IN|PRA1'.
+    - Domains are the alternatives inside each group, an alternative being an
+      activity plus any activities it is paired with, e.g. 01-P1 and 01-P2.
+    - Every pair of variables must not clash, unless the activities involved
+      are clashable (Delayed).
+
+apply_arc: apply arc-consistency (AC-3) to the domain and return the arc-consistent domain
+    - Returns None if an arc-consistent domain cannot be found.
+    - Only considers hard constraints - i.e. the ones that must be satisfied, such as
+      there must be no clashes between non-clashable activities.
 
-apply_arc: apply arc-consistency to the domain and return the arc-consistent domain
-    - Returns failure if an arc-consistent domain cannot be found.
-    - Should only accept hard constraints - i.e. the ones that must be satisfied, such as
-      there must be no clashes between non-clashable clashes, must enrol in one and only
-      one prac etc.
-    - Should accept a list of hard constraints and the domain
+solve/iter_solutions (method_1): solve the constraint satisfaction problem with
+    backtracking search, choosing variables by MRV then degree, and forward checking
+    each assignment. iter_solutions is lazy, as a full course load can have a huge
+    number of valid timetables.
 
-method_1: solve the constraint satisfaction problem and return a list of solutions
+prepare: precompute everything the search needs, so no clash is evaluated per node.
+    - Every alternative gets an id and a bitmask of the (week x day x SLOT_MINUTES slot)s
+      its non-clashable activities take up.
+    - The clash matrix is a bitset per alternative of the ids of the alternatives it
+      clashes with, so compatibility is one bit test and domains (bitsets of ids) are
+      pruned with one AND NOT.
 
-method_2: rate solution with some reward funtion and order them based on the score.
-    Should accept a list/dict of reward functions and a single solution from method_1
-    Return a dictionary with keys being the score and values being the plan.
+rank (method_2): rate solutions with reward functions and return the best k, best first.
+    - Accepts a dict of reward ID (constants.solver) -> parameters, see rewards.REWARDS.
+    - Scores are streamed from the search into a heap of size k, so memory is O(k) no
+      matter how many timetables are valid.
+    - Branch and bound: penalties never decrease as activities are added, so a partial
+      timetable scoring below the worst kept timetable is pruned.
+    - workers > 1 splits the search tree on its first variables and searches the subtrees
+      in a process pool. Workers share the best k-th score any of them has found as the
+      pruning bound, and their top k are merged, so the result is the same as workers=1.
 
-    Note: It would be good to have some constants to represent each reward function
-    e.g. 0 stands for classes at 8 am
+add_course/remove_course/add_preference/remove_preference: change the problem in place.
+    - Only the new alternatives get ids and clash rows, removed ones leave a gap, so every
+      other alternative keeps its id and the rest of the clash matrix is untouched.
+    - The next rank is warm started from the last one's timetables, projected onto the
+      new variables (and completed if courses were added) and rescored, so it starts with
+      a good pruning bound.
 
     Suggestions for available score conditions (Anyone can add to it):
     - negative reward for classes too early (because we all hate classes at 8 am)
     - Avoid having 8 hours of class in one day?
     - Maybe customize time frame to avoid?
 """
-from typing import Optional, Dict, Tuple
+import heapq
+import math
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterator, Optional
 
 from api.timetable_api_calls import *
 from api.TTableInputs import *
+from api.activity import Activity
+from constants.solver import *
+from rewards import Reward, make_rewards
+
+# An alternative is the sorted keys of an activity and the activities paired
+# with it, all of which are attended together.
+Alternative = tuple[str, ...]
+
+# A node of the search tree: (variable -> alternative id, domain bitsets, reward states, penalty)
+Node = tuple[dict[str, int], dict[str, int], tuple, float]
+
 
-"""
-I am currently unable to recall what is the key for courseID like 'CSSE2010' and for activity length
-Therefore line 60 and line 64 will not work
-Will fix it later when API is back.
-"""
 class Solver:
     def __init__(self, courses: Optional[list[CourseTimetable]] = None):
         self.variables = []  # Initialise variables to be an empty list
-        self.domains = {}  #Initialise a dictionary of domains
-        self.length_constraint = {}
+        self.domains = {}  # Initialise a dictionary of domains
+        self.activities = {}  # Activity records by key, for every domain value
         self.intersect_constraints = [] # basically, the variables that must not intersect
         # for example, if a delayed lecture is assigned, we do not need to worry about it, so we will remove it from
         # intersect constraints. By default, every variable will be in the intersect constraint.
+        self.neighbours = {}  # Variables that share a (non-trivial) constraint
+
+        # Bitset form of the problem, built by prepare.
+        self.alternatives = []  # Alternative id -> Alternative
+        self._alternative_ids = {}  # Alternative -> id
+        self._slot_masks = []  # Alternative id -> bitmask of the slots it takes up
+        self._attended = []  # Alternative id -> its non-clashable Activity records
+        self._clashes = []  # Alternative id -> bitset of the alternative ids it clashes with
+        self._domain_masks = {}  # Variable -> bitset of alternative ids
+        self._variable_of = []  # Alternative id -> its variable
+        self._first_week = 0  # Week the slot masks are counted from
+        self._prepared = False
+
+        self.preferences = {}  # Reward ID -> keyword arguments, used when rank isn't given any
+        self._last_ranked = []  # Timetables found by the last rank, to warm start the next
 
-        if courses != None:
+        if courses is not None:
             for course in courses:
                 self.process_conditions(course)
 
-    def process_conditions(self, course: CourseTimetable):
+    def process_conditions(self, course: CourseTimetable) -> None:
         """
         :param course: a CourseTimetable that contains everything
-        :return: A list of hard binary constraints
+        Adds the course's activity groups as variables, with their alternatives as domains.
+        The no-clash constraints between them are built by prepare.
 
         Note: binary constraint means a constraint between two variables.
         """
-        for activity in course.get_activities().values():
-            code = activity.get("activity_code")
-            if code not in self.variables:
-                activity_id = (course.get_course()[0] + activity.get("activity_code")) # FIX!
-                self.variables.append(activity_id)
-                self.domains[code] = list()
-                self.intersect_constraints.append(activity.get("activity_code"))
-                self.length_constraint[activity_id] = None # FIX!
+        records = course.get_activity_records()
+        self.activities.update(records)
+
+        groups = {}
+        for activity in records.values():
+            variable = f"{activity.course}|{activity.group}"
+            alternative = tuple(sorted((activity.key, *activity.linked)))
+            # dict as an ordered set, paired activities give the same alternative.
+            groups.setdefault(variable, {})[alternative] = None
+
+        for variable, alternatives in groups.items():
+            if variable in self.domains:
+                continue
+            self.variables.append(variable)
+            self.domains[variable] = list(alternatives)
+
+            if not all(self.is_clashable(alternative) for alternative in alternatives):
+                self.intersect_constraints.append(variable)
+
+        self._prepared = False
+
+    def add_course(self, course: CourseTimetable) -> None:
+        """Adds a course, only building the clash rows of its alternatives."""
+        if not self._prepared:
+            self.process_conditions(course)
+            return
+
+        known = set(self.variables)
+        self.process_conditions(course)
+        self._extend([variable for variable in self.variables if variable not in known])
+        self._prepared = True
+
+    def remove_course(self, course: str) -> None:
+        """
+        Removes every variable of a course, the other alternatives keep their ids.
+
+        :param course: the course code, e.g. 'CSSE2002', or one version of it,
+            e.g. 'CSSE2002-S2-STLUC-IN'
+        """
+        def matches(name: str) -> bool:
+            return name == course or name.split("-")[0] == course
+
+        removed = [variable for variable in self.variables
+                   if matches(variable.split("|")[0])]
+        if not removed:
+            return
+
+        for variable in removed:
+            for alternative in self.domains.pop(variable):
+                i = self._alternative_ids.pop(alternative, None)
+                if i is not None:
+                    self.alternatives[i] = None
+                    self._slot_masks[i], self._attended[i], self._clashes[i] = 0, (), 0
+            self._domain_masks.pop(variable, None)
+            for neighbour in self.neighbours.pop(variable, ()):
+                self.neighbours[neighbour].discard(variable)
+
+        removed_set = set(removed)
+        self.variables = [variable for variable in self.variables if variable not in removed_set]
+        self.intersect_constraints = [variable for variable in self.intersect_constraints
+                                      if variable not in removed_set]
+        self.activities = {key: activity for key, activity in self.activities.items()
+                           if not matches(activity.course)}
+        # Ids aren't reused and no domain holds a removed id, so the bits other clash rows
+        # have for them are never read and can be left alone.
 
+    def add_preference(self, reward_id: int, **parameters) -> None:
+        """Adds (or replaces) a reward used by rank, see rewards.REWARDS."""
+        make_rewards({reward_id: parameters})  # Fail now rather than on the next rank
+        self.preferences[reward_id] = parameters
+
+    def remove_preference(self, reward_id: int) -> None:
+        self.preferences.pop(reward_id, None)
+
+    def is_clashable(self, alternative: Alternative) -> bool:
+        """Delayed activities are recorded, so can clash with anything."""
+        return all(self._is_clashable_activity(self.activities[key]) for key in alternative)
+
+    @staticmethod
+    def _is_clashable_activity(activity: Activity) -> bool:
+        return activity.activity_type == TTableInputs.ActivityTypes.DEL.value
+
+    def prepare(self) -> None:
+        """Builds the alternative ids, slot masks, clash matrix, domain bitsets and
+        neighbours. Called automatically before solving, after courses are added."""
+        if self._prepared:
+            return
+
+        self.alternatives, self._alternative_ids, self._domain_masks = [], {}, {}
+        self._slot_masks, self._attended, self._clashes, self._variable_of = [], [], [], []
+        self.neighbours = {}
+        self._first_week = min((activity.week_offset for activity in self.activities.values()),
+                               default=0)
+        self._extend(self.variables)
+        self._prepared = True
+
+    def _extend(self, variables: list[str]) -> None:
+        """Gives the alternatives of new variables the next ids, and builds their slot
+        masks, clash rows and neighbours. Existing alternatives keep their ids."""
+        first_week = min((self.activities[key].week_offset for variable in variables
+                          for alternative in self.domains[variable] for key in alternative),
+                         default=self._first_week)
+        if first_week < self._first_week:
+            # Slot masks count weeks from the first week, so an earlier week shifts them all.
+            shift = (self._first_week - first_week) * 7 * SLOTS_PER_DAY
+            self._slot_masks = [mask << shift for mask in self._slot_masks]
+            self._first_week = first_week
+
+        first_new = len(self.alternatives)
+        for variable in variables:
+            self._domain_masks[variable] = 0
+            for alternative in self.domains[variable]:
+                i = len(self.alternatives)
+                self.alternatives.append(alternative)
+                self._alternative_ids[alternative] = i
+                self._domain_masks[variable] |= 1 << i
+                self._variable_of.append(variable)
+                self._slot_masks.append(self._slot_mask(alternative, self._first_week))
+                self._attended.append(tuple(self.activities[key] for key in alternative
+                                            if not self._is_clashable_activity(self.activities[key])))
+                self._clashes.append(0)
+
+        for i in range(first_new, len(self.alternatives)):
+            first_mask = self._slot_masks[i]
+            if not first_mask:
+                continue
+            for j in range(i):
+                # Slots are a coarse filter, times not on a slot boundary are rounded out,
+                # so shared slots are confirmed against the exact times.
+                if (first_mask & self._slot_masks[j] and self._variable_of[i] != self._variable_of[j] and
+                        self._alternatives_clash(self.alternatives[i], self.alternatives[j])):
+                    self._clashes[i] |= 1 << j
+                    self._clashes[j] |= 1 << i
+
+        for variable in variables:
+            self.neighbours[variable] = set()
+        for variable in variables:
+            clashes = 0
+            for i in self._ids(self._domain_masks[variable]):
+                clashes |= self._clashes[i]
+            for other in self.variables:
+                if other != variable and clashes & self._domain_masks[other]:
+                    self.neighbours[variable].add(other)
+                    self.neighbours[other].add(variable)
+
+    def _slot_mask(self, alternative: Alternative, first_week: int) -> int:
+        """Bit ((week * 7) + day) * SLOTS_PER_DAY + slot is set for every slot a
+        non-clashable activity of the alternative takes up, weeks counted from first_week."""
+        mask = 0
+        for key in alternative:
+            activity = self.activities[key]
+            if self._is_clashable_activity(activity):
+                continue
+
+            first_slot = activity.start // SLOT_MINUTES
+            last_slot = -(-activity.end // SLOT_MINUTES)  # Rounded up
+            day_mask = ((1 << (last_slot - first_slot)) - 1) << first_slot
+
+            week_mask, week = activity.week_mask, activity.week_offset - first_week
+            while week_mask:
+                if week_mask & 1:
+                    mask |= day_mask << ((week * 7 + activity.day) * SLOTS_PER_DAY)
+                week_mask >>= 1
+                week += 1
+        return mask
+
+    def _alternatives_clash(self, first: Alternative, second: Alternative) -> bool:
+        for first_key in first:
+            for second_key in second:
+                first_activity, second_activity = self.activities[first_key], self.activities[second_key]
+                if (not self._is_clashable_activity(first_activity) and
+                        not self._is_clashable_activity(second_activity) and
+                        first_activity.clashes_with(second_activity)):
+                    return True
+        return False
+
+    @staticmethod
+    def _ids(mask: int) -> Iterator[int]:
+        """Yields the set bits of a bitset, lowest first."""
+        while mask:
+            lowest = mask & -mask
+            yield lowest.bit_length() - 1
+            mask ^= lowest
+
+    def _to_masks(self, domains: dict[str, list[Alternative]]) -> dict[str, int]:
+        return {variable: sum(1 << self._alternative_ids[alternative] for alternative in domain)
+                for variable, domain in domains.items()}
+
+    def _to_lists(self, masks: dict[str, int]) -> dict[str, list[Alternative]]:
+        return {variable: [self.alternatives[i] for i in self._ids(mask)]
+                for variable, mask in masks.items()}
+
+    def compatible(self, first: Alternative, second: Alternative) -> bool:
+        """Checks that no (non-clashable) activity of one alternative clashes with the other's."""
+        self.prepare()
+        return not (self._clashes[self._alternative_ids[first]] >>
+                    self._alternative_ids[second] & 1)
 
     """
     :var assignment: the dictionary representing the assigned values
-         The key should be a tuple in the format of (course_code, activity_code)
-         and value should be a tuple in the format of (day, start_time, end_time)
-         where day must be an integer in range(1, 6)
-         start_time and end_time must be in DAY_TIME_FORMAT
+         The key should be a variable, e.g. 'CSSE2010-S2-STLUC-IN|PRA1'
+         and value should be one of the alternatives in its domain.
     """
-    def check_intersect_constraints(self, assignment:dict[tuple[str, str], tuple[int, str, str]]) -> bool:
-        pass
+    def check_intersect_constraints(self, assignment: dict[str, Alternative]) -> bool:
+        self.prepare()
+        assigned = 0
+        for alternative in assignment.values():
+            i = self._alternative_ids[alternative]
+            if self._clashes[i] & assigned:
+                return False
+            assigned |= 1 << i
+        return True
 
-"""
-Variables are the activities. 'activity-group-code'
-Domains are everything inside the group
-if activity == 'Delayed' then it is Clashable
-"""
+    def apply_arc(self, domains: Optional[dict[str, list[Alternative]]] = None
+                  ) -> Optional[dict[str, list[Alternative]]]:
+        """
+        AC-3, removes every alternative that has no compatible alternative left in a
+        neighbouring variable's domain.
 
+        :param domains: the domains to make arc-consistent, defaults to self.domains
+        :return: the arc-consistent domains, or None if a domain became empty
+        """
+        self.prepare()
+        masks = self._arc_consistent(self._to_masks(domains or self.domains))
+        return None if masks is None else self._to_lists(masks)
 
+    def _arc_consistent(self, masks: dict[str, int]) -> Optional[dict[str, int]]:
+        masks = dict(masks)
+        queue = deque((variable, other) for variable in self.variables
+                      for other in self.neighbours[variable])
+
+        while queue:
+            variable, other = queue.popleft()
+            # An alternative is supported if something in the other domain doesn't clash with it.
+            revised = masks[variable]
+            for i in self._ids(masks[variable]):
+                if not masks[other] & ~self._clashes[i]:
+                    revised &= ~(1 << i)
+
+            if revised != masks[variable]:
+                if not revised:
+                    return None
+                masks[variable] = revised
+                queue.extend((neighbour, variable) for neighbour in self.neighbours[variable]
+                             if neighbour != other)
+        return masks
+
+    def iter_solutions(self, domains: Optional[dict[str, list[Alternative]]] = None,
+                       stop: Optional[Callable[[], bool]] = None
+                       ) -> Iterator[dict[str, Alternative]]:
+        """
+        Lazily yields every valid timetable, a complete assignment of variables to
+        alternatives which satisfies every constraint.
+
+        :param stop: polled as the search runs, if it returns True no more are yielded
+        """
+        self.prepare()
+        masks = self._arc_consistent(self._to_masks(domains or self.domains))
+        if masks is None:
+            return
+        for _, assignment in self._search(masks, stop=stop):
+            yield self._to_alternatives(assignment)
+
+    def solve(self, limit: Optional[int] = None, stop: Optional[Callable[[], bool]] = None
+              ) -> list[dict[str, Alternative]]:
+        """Returns (up to `limit`) valid timetables, see iter_solutions."""
+        return list(islice(self.iter_solutions(stop=stop), limit))
+
+    def rank(self, preferences: Optional[dict[int, dict]] = None, k: int = DEFAULT_TOP_K,
+             domains: Optional[dict[str, list[Alternative]]] = None,
+             workers: int = 1, stop: Optional[Callable[[], bool]] = None,
+             on_improve: Optional[Callable[[float, dict[str, Alternative]], None]] = None
+             ) -> list[tuple[float, dict[str, Alternative]]]:
+        """
+        Finds the k highest scoring valid timetables.
+
+        :param preferences: reward ID -> keyword arguments, e.g. {EARLY_CLASS_REWARD: {}},
+            defaults to the ones added by add_preference
+        :param k: how many timetables to keep
+        :param domains: the domains to search, defaults to self.domains
+        :param workers: processes to search with, only worth it for heavy course loads
+        :param stop: polled as the search runs, if it returns True the search ends early
+            and the best timetables found so far are returned. Only used when workers=1.
+        :param on_improve: called with the score and timetable whenever a better timetable
+            than any so far is found, e.g. to show progress. Only used when workers=1.
+        :return: (score, timetable) pairs, best first. Ties are broken by the order of
+            the alternatives, so the result is deterministic and doesn't depend on workers.
+        """
+        self.prepare()
+        rewards = make_rewards(self.preferences if preferences is None else preferences)
+        masks = self._arc_consistent(self._to_masks(domains or self.domains))
+        if masks is None or k < 1:
+            return []
+
+        # The search finds the warm start timetables again, so they're skipped when it does.
+        heap, seeded = [], set()
+        for score, assignment in self._warm_start(masks, rewards):
+            # Timetables that only differed in removed variables project to the same one
+            self._keep(heap, k, score, assignment, seeded)
+            seeded.add(tuple(-assignment[variable] for variable in self.variables))
+
+        if workers > 1:
+            ranked = self._rank_parallel(masks, rewards, k, workers, heap)
+        else:
+            best = None
+            if heap:
+                best, _, assignment = max(heap)
+                if on_improve is not None:
+                    on_improve(best, self._to_alternatives(assignment))
+            for score, assignment in self._search(masks, rewards,
+                                                  lambda: heap[0][0] if len(heap) >= k else None,
+                                                  stop=stop):
+                self._keep(heap, k, score, assignment, seeded)
+                if on_improve is not None and (best is None or score > best):
+                    best = score
+                    on_improve(score, self._to_alternatives(assignment))
+            ranked = self._ranked(heap)
+
+        self._last_ranked = [timetable for _, timetable in ranked]
+        return ranked
+
+    def _warm_start(self, masks: dict[str, int], rewards: list[Reward]
+                    ) -> Iterator[tuple[float, dict[str, int]]]:
+        """Rescores the last rank's timetables, without the variables since removed,
+        and completed (with the first valid completion) if variables were added."""
+        for timetable in self._last_ranked:
+            node = self._node({variable: self._alternative_ids.get(timetable.get(variable))
+                               for variable in self.variables if variable in timetable},
+                              masks, rewards)
+            if node is not None:
+                yield from islice(self._search(masks, rewards, start=node), 1)
+
+    def _node(self, assignment: dict[str, Optional[int]], masks: dict[str, int],
+              rewards: list[Reward]) -> Optional[Node]:
+        """The search tree node reached by making `assignment`, or None if it's invalid."""
+        node = ({}, masks, tuple(reward.initial_state() for reward in rewards), 0.0)
+        for variable, i in assignment.items():
+            if i is None or not node[1][variable] >> i & 1:
+                return None
+            pruned = self._forward_check(variable, i, node[0], node[1])
+            if pruned is None:
+                return None
+            node = ({**node[0], variable: i}, pruned, *self._add_rewards(rewards, node[2], node[3], i))
+        return node
+
+    def _rank_parallel(self, masks: dict[str, int], rewards: list[Reward], k: int,
+                       workers: int, heap: list) -> list[tuple[float, dict[str, Alternative]]]:
+        nodes = self._partition(masks, rewards, workers * SOLVER_PARTITIONS_PER_WORKER)
+        bound = multiprocessing.Value("d", heap[0][0] if len(heap) >= k else -math.inf)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self, rewards, k, bound)) as executor:
+            entries = {entry[1]: entry for entry in heap}  # Drops the warm start duplicates
+            for partition_heap in executor.map(_rank_partition, nodes):
+                entries.update((entry[1], entry) for entry in partition_heap)
+        return self._ranked(heapq.nlargest(k, entries.values(), key=lambda entry: entry[:2]))
+
+    def _partition(self, masks: dict[str, int], rewards: list[Reward], count: int) -> list[Node]:
+        """Expands the search tree a level at a time until there are at least `count`
+        subtrees to search (or the whole tree is expanded), returned in search order."""
+        nodes = [({}, masks, tuple(reward.initial_state() for reward in rewards), 0.0)]
+        while len(nodes) < count and any(len(node[0]) < len(self.variables) for node in nodes):
+            expanded = []
+            for node in nodes:
+                assignment, masks, states, penalty = node
+                if len(assignment) == len(self.variables):
+                    expanded.append(node)
+                    continue
+                variable = self._select_variable(assignment, masks)
+                for i in self._ids(masks[variable]):
+                    pruned = self._forward_check(variable, i, assignment, masks)
+                    if pruned is not None:
+                        expanded.append(({**assignment, variable: i}, pruned,
+                                         *self._add_rewards(rewards, states, penalty, i)))
+            nodes = expanded
+        return nodes
+
+    def _keep(self, heap: list, k: int, score: float, assignment: dict[str, int],
+              skip: set = frozenset()) -> None:
+        """Pushes a solution onto a size k min-heap, whose root is the worst kept solution.
+        Between equal scores, the solution with the larger ids (in variable order) is worse.
+        Solutions whose (negated) ids are in `skip` are already on the heap."""
+        key = (score, tuple(-assignment[variable] for variable in self.variables))
+        if key[1] in skip:
+            return
+        # The search reuses `assignment`, so it's only copied once it's kept.
+        if len(heap) < k:
+            heapq.heappush(heap, (*key, dict(assignment)))
+        elif key > heap[0][:2]:
+            heapq.heapreplace(heap, (*key, dict(assignment)))
+
+    def _ranked(self, heap: list) -> list[tuple[float, dict[str, Alternative]]]:
+        return [(score, self._to_alternatives(assignment))
+                for score, _, assignment in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def _to_alternatives(self, assignment: dict[str, int]) -> dict[str, Alternative]:
+        return {variable: self.alternatives[i] for variable, i in assignment.items()}
+
+    def _search(self, masks: dict[str, int], rewards: list[Reward] = (),
+                threshold: Optional[Callable[[], Optional[float]]] = None,
+                start: Optional[Node] = None, stop: Optional[Callable[[], bool]] = None
+                ) -> Iterator[tuple[float, dict[str, int]]]:
+        """
+        Depth first search over the bitset domains, with an explicit stack so solutions
+        aren't passed up through a generator per level.
+
+        :param rewards: scores the timetables, the score of a partial timetable is
+            an upper bound on the score of any timetable completing it.
+        :param threshold: returns the score a timetable must at least reach to be worth
+            finding, or None. Partial timetables scoring less are pruned.
+        :param start: the node to search below, defaults to the root (masks)
+        :param stop: checked before each node, the search ends once it returns True
+        :return: (score, variable -> alternative id) for each valid timetable found. The
+            dict is reused by the search, so must be copied to be kept past the next one.
+        """
+        if start is None:
+            start = ({}, masks, tuple(reward.initial_state() for reward in rewards), 0.0)
+        assignment, masks, states, penalty = start
+        assignment = dict(assignment)
+        if len(assignment) == len(self.variables):
+            yield -penalty, assignment
+            return
+
+        variable = self._select_variable(assignment, masks)
+        stack = [(variable, self._ids(masks[variable]), masks, states, penalty)]
+        while stack:
+            if stop is not None and stop():
+                return
+            variable, candidates, masks, states, penalty = stack[-1]
+            assignment.pop(variable, None)
+            for i in candidates:
+                pruned = self._forward_check(variable, i, assignment, masks)
+                if pruned is None:
+                    continue
+
+                new_states, new_penalty = states, penalty
+                if rewards:
+                    new_states, new_penalty = self._add_rewards(rewards, states, penalty, i)
+                    minimum = threshold() if threshold is not None else None
+                    if minimum is not None and -new_penalty < minimum:
+                        continue
+                break
+            else:
+                stack.pop()
+                continue
+
+            assignment[variable] = i
+            if len(assignment) == len(self.variables):
+                yield -new_penalty, assignment
+                continue
+            variable = self._select_variable(assignment, pruned)
+            stack.append((variable, self._ids(pruned[variable]), pruned, new_states, new_penalty))
+
+    def _add_rewards(self, rewards: list[Reward], states: tuple, penalty: float,
+                     alternative: int) -> tuple[tuple, float]:
+        new_states = []
+        for reward, state in zip(rewards, states):
+            state, added = reward.add(state, self._attended[alternative])
+            new_states.append(state)
+            penalty += added
+        return tuple(new_states), penalty
+
+    def _select_variable(self, assignment: dict[str, int], masks: dict[str, int]) -> str:
+        """MRV, ties broken by degree (most unassigned neighbours) and then name."""
+        return min(
+            (variable for variable in self.variables if variable not in assignment),
+            key=lambda variable: (
+                masks[variable].bit_count(),
+                -sum(neighbour not in assignment for neighbour in self.neighbours[variable]),
+                variable
+            )
+        )
+
+    def _forward_check(self, variable: str, alternative: int,
+                       assignment: dict[str, int],
+                       masks: dict[str, int]) -> Optional[dict[str, int]]:
+        """Removes the alternatives of unassigned neighbours that clash with `alternative`,
+        returns None if any of their domains become empty."""
+        pruned = dict(masks)
+        pruned[variable] = 1 << alternative
+        not_clashing = ~self._clashes[alternative]
+        for neighbour in self.neighbours[variable]:
+            if neighbour in assignment:
+                continue
+            remaining = masks[neighbour] & not_clashing
+            if not remaining:
+                return None
+            pruned[neighbour] = remaining
+        return pruned
+
+
+# Set in each worker process of Solver._rank_parallel by _init_worker.
+_worker_solver: Optional[Solver] = None
+_worker_rewards: list[Reward] = []
+_worker_k = DEFAULT_TOP_K
+_worker_bound = None  # multiprocessing.Value, the best k-th score found by any worker
+
+
+def _init_worker(solver: Solver, rewards: list[Reward], k: int, bound) -> None:
+    global _worker_solver, _worker_rewards, _worker_k, _worker_bound
+    _worker_solver, _worker_rewards, _worker_k, _worker_bound = solver, rewards, k, bound
+
+
+def _rank_partition(node: Node) -> list:
+    """Ranks the subtree below node, returns the heap entries of its top k."""
+    # Reading the shared bound without its lock is fine, a stale bound only prunes less.
+    shared = _worker_bound.get_obj()
+    heap = []
+
+    def threshold() -> float:
+        # Any worker's k-th best is a lower bound on the overall k-th best. Pruning is
+        # strict, so timetables tied with the bound are still found for the tie break.
+        return max(heap[0][0], shared.value) if len(heap) >= _worker_k else shared.value
+
+    for score, assignment in _worker_solver._search(node[1], _worker_rewards, threshold, node):
+        _worker_solver._keep(heap, _worker_k, score, assignment)
+        if len(heap) >= _worker_k and heap[0][0] > shared.value:
+            with _worker_bound.get_lock():
+                shared.value = max(shared.value, heap[0][0])
+    return heap
 
 
 if __name__ == "__main__":
@@ -88,11 +631,10 @@ if __name__ == "__main__":
                               semester=TTableInputs.Semester.S2,
                               campus_id=TTableInputs.Campus.STLUC,
                               form_type=TTableInputs.Form.IN)
-    print(course1.course_versions)
-    # act1 = course1.get_activities()
-    # for i, j in act1.items():
-    #     print(i, j)
-    # course2 = CourseTimetable(course="CSSE2002", semester=TTableInputs.Semester.S2)
-    # act2 = course2.get_activities()
-    # print(act1, act2)
-    # print(course1.get_overlap(course1,"CSSE2010-S2-STLUC-IN|LEC1|01",course2,"CSSE2002-S2-STLUC-IN|LEC1|01"))
+    course2 = CourseTimetable(course="CSSE2002",
+                              semester=TTableInputs.Semester.S2,
+                              campus_id=TTableInputs.Campus.STLUC,
+                              form_type=TTableInputs.Form.IN)
+    solver = Solver([course1, course2])
+    for score, solution in solver.rank({EARLY_CLASS_REWARD: {}, DAILY_HOURS_REWARD: {}}, k=5):
+        print(score, solution)
@@ -0,0 +1,148 @@
+import json
+import lzma
+import os
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, IO, Iterator
+
+# Files written with a compressing codec start with this, followed by one
+# frame per top-level key, see `dump_framed`.
+FRAMED_MAGIC = b"UQTT\x01"
+_LENGTH = struct.Struct(">I")
+
+
+class Codec(ABC):
+    """Serialises single values to bytes.
+
+    Every encoded value starts with the codec's one byte tag, so values can
+    be decoded with `decode` without knowing which codec wrote them.
+    """
+    name: str
+    tag: bytes
+
+    def encode(self, value: Any) -> bytes:
+        return self.tag + self._compress(
+            json.dumps(value, separators=(",", ":")).encode())
+
+    @abstractmethod
+    def _compress(self, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def _decompress(self, data: bytes) -> bytes:
+        pass
+
+
+class JsonCodec(Codec):
+    name = "json"
+    tag = b"j"
+
+    def _compress(self, data: bytes) -> bytes:
+        return data
+
+    def _decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCodec(Codec):
+    name = "zlib"
+    tag = b"z"
+
+    def _compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, 6)
+
+    def _decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class LzmaCodec(Codec):
+    name = "lzma"
+    tag = b"x"
+
+    def _compress(self, data: bytes) -> bytes:
+        return lzma.compress(data)
+
+    def _decompress(self, data: bytes) -> bytes:
+        return lzma.decompress(data)
+
+
+CODECS = {codec.name: codec
+          for codec in (JsonCodec(), ZlibCodec(), LzmaCodec())}
+_CODECS_BY_TAG = {codec.tag: codec for codec in CODECS.values()}
+
+
+def get_codec(name: str) -> Codec:
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec, {name=}. Valid options are "
+                         f"{list(CODECS)}")
+    return CODECS[name]
+
+
+def decode(data: bytes | str) -> Any:
+    """Decodes a value written by any codec. Plain JSON text, as written
+    before codecs were added, is also accepted.
+
+    :param data: The encoded value.
+        :type data: bytes or str.
+    :return: The decoded value.
+    :raises ValueError: If the value can't be decoded.
+    """
+    if isinstance(data, str):
+        return json.loads(data)
+
+    # No JSON value can start with one of the tags.
+    codec = _CODECS_BY_TAG.get(data[:1])
+    if codec is None:
+        return json.loads(data)
+    try:
+        return json.loads(codec._decompress(data[1:]))
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Corrupt {codec.name} value: {e}") from e
+
+
+def dump_framed(file: IO[bytes], data: dict,
+                codec: Codec) -> dict[str, tuple[int, int]]:
+    """Dumps `data` as `FRAMED_MAGIC` followed by a frame per top-level key,
+    each frame is the length prefixed key and then the length prefixed,
+    encoded, value.
+
+    :return: The (offset, length) of each encoded value in the file.
+        :rtype: dict[str, tuple[int, int]].
+    """
+    offsets = {}
+    position = file.write(FRAMED_MAGIC)
+    for key, value in data.items():
+        key_bytes = key.encode()
+        value_bytes = codec.encode(value)
+
+        position += file.write(_LENGTH.pack(len(key_bytes)) + key_bytes +
+                               _LENGTH.pack(len(value_bytes)))
+        offsets[key] = (position, len(value_bytes))
+        position += file.write(value_bytes)
+    return offsets
+
+
+def iter_framed(file: IO[bytes]) -> Iterator[tuple[str, int, int]]:
+    """Iterates over the frames of a file written by `dump_framed`, without
+    reading the values. `file` must be positioned after `FRAMED_MAGIC`.
+
+    :return: The key, offset and length of each value in the file.
+    :raises ValueError: If the file is truncated.
+    """
+    size = os.fstat(file.fileno()).st_size
+    while header := file.read(_LENGTH.size):
+        key = file.read(_read_length(header)).decode()
+        length = _read_length(file.read(_LENGTH.size))
+        offset = file.tell()
+
+        if offset + length > size:
+            raise ValueError("Truncated frame")
+        file.seek(length, 1)
+        yield key, offset, length
+
+
+def _read_length(header: bytes) -> int:
+    if len(header) != _LENGTH.size:
+        raise ValueError("Truncated frame header")
+    return _LENGTH.unpack(header)[0]
@@ -1,8 +1,10 @@
 import logging
 import json
 import os
+from typing import Any
 
 from constants.common import *
+from .codec import FRAMED_MAGIC, decode, iter_framed
 from .write import JsonWriter as jw
 
 
@@ -18,6 +20,88 @@ class JsonReader:
                             format=LOG_FORMAT)
         self._default_logger = logging.getLogger(__name__)
 
+    # Parsed indexes, keyed on the data file's path. Shared between instances
+    # as one is created per read.
+    _indexes: dict[str, dict] = {}
+
+    def read_key(self, file_path: str, key: str,
+                 logger: logging.Logger = None) -> Any:
+        """
+        Reads a single top-level value from a JSON file, without loading the
+        rest of the file.
+
+        Uses the index written alongside the file by JsonWriter. If the index
+        is missing or out of date, compressed files are scanned frame by frame
+        and plain JSON files are read whole instead.
+
+        :param file_path: The path to the JSON file.
+            :type: str.
+        :param key: The top-level key to read.
+            :type: str.
+        :param logger: (Optional) The logger to use. If not provided, the
+            default logger is used.
+            :type: logging.Logger or None.
+        :return: The value stored under `key`, or None if there isn't one.
+        """
+        logger = logger or self._default_logger
+
+        index = self._load_index(file_path)
+        try:
+            with open(file_path, "rb") as file:
+                if index is not None:
+                    location = index["keys"].get(key)
+                elif file.read(len(FRAMED_MAGIC)) == FRAMED_MAGIC:
+                    location = next(((offset, length)
+                                     for frame_key, offset, length
+                                     in iter_framed(file)
+                                     if frame_key == key), None)
+                else:
+                    logger.debug("No valid index for "
+                                 f"{os.path.basename(file_path)}, reading "
+                                 "whole file.")
+                    return self.extract_from_json_cache(
+                        file_path, logger=logger).get(key)
+
+                if location is None:
+                    return None
+                offset, length = location
+                file.seek(offset)
+                return decode(file.read(length))
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading {key} from "
+                         f"{os.path.basename(file_path)}: {e}")
+            self._indexes.pop(file_path, None)
+            return self.extract_from_json_cache(file_path,
+                                                logger=logger).get(key)
+
+    def _load_index(self, file_path: str) -> dict | None:
+        """Returns the index for `file_path`, or None if there isn't one
+        that matches the file as it is now.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        index = self._indexes.get(file_path)
+        if not self._index_matches(index, stat):
+            try:
+                with open(f"{file_path}{JSON_INDEX_SUFFIX}", "r") as file:
+                    index = json.load(file)
+            except (OSError, ValueError):
+                return None
+            if not self._index_matches(index, stat):
+                return None
+            self._indexes[file_path] = index
+        return index
+
+    @staticmethod
+    def _index_matches(index: dict | None, stat: os.stat_result) -> bool:
+        return (index is not None and
+                index.get("inode") == stat.st_ino and
+                index.get("size") == stat.st_size and
+                index.get("mtime_ns") == stat.st_mtime_ns)
+
     def extract_from_json_cache(self, file_path: str,
                                 logger: logging.Logger = None) -> dict:
         """
@@ -35,8 +119,17 @@ class JsonReader:
         filename = os.path.basename(file_path)
 
         try:
-            with open(file_path, "r") as file:
-                data = json.load(file)
+            with open(file_path, "rb") as file:
+                if file.read(len(FRAMED_MAGIC)) == FRAMED_MAGIC:
+                    # Keys are found first, then each value is read.
+                    frames = list(iter_framed(file))
+                    data = {}
+                    for key, offset, length in frames:
+                        file.seek(offset)
+                        data[key] = decode(file.read(length))
+                else:
+                    file.seek(0)
+                    data = json.loads(file.read())
             return data
         except json.JSONDecodeError as e:
             logger.error(f"Error decoding JSON: {e}")
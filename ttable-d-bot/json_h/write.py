@@ -1,9 +1,13 @@
+import asyncio
 import logging
 import json
 import os
 import shutil
+import tempfile
+from typing import Any, Callable, IO
 
 from constants.common import *
+from .codec import Codec, dump_framed, get_codec
 
 
 class JsonWriter:
@@ -13,6 +17,11 @@ class JsonWriter:
 
         This class provides methods for managing JSON files, including
         creating backups and clearing content.
+
+        Files are replaced atomically, so readers only ever see the old or
+        the new content, never a partially written file. Each file is written
+        with an index of where every top-level value starts, see
+        `JsonReader.read_key`.
         """
         logging.basicConfig(level=logging.INFO,
                             format=LOG_FORMAT)
@@ -69,15 +78,15 @@ class JsonWriter:
         if backup:
             self.backup_json(file_path, logger=logger)
 
-        with open(file_path, "w") as file:
-            json.dump({}, file)
+        self._write_indexed(file_path, {}, get_codec("json"))
 
         logger = logger or self._default_logger
         logger.info(f"{os.path.basename(file_path)} cleared/reset.")
 
     def write(self, file_path: str, data: dict,
               logger: logging.Logger = None,
-              backup: bool = True) -> None:
+              backup: bool = True,
+              codec: str = "json") -> None:
         """Write to a json file.
 
         :param file_path: The path to the JSON file.
@@ -90,12 +99,123 @@ class JsonWriter:
         :param backup: (Optional) Whether to create a backup before clearing.
             Defaults to True.
             :type backup: bool.
+        :param codec: (Optional) The name of the codec to write with, see
+            `codec.CODECS`. "json" writes plain JSON, anything else writes
+            a compressed binary file, either is read back by JsonReader.
+            Defaults to "json".
+            :type codec: str.
         """
         logger = logger or self._default_logger
 
         if backup:
             self.backup_json(file_path, logger=logger)
 
-        with open(file_path, "w") as file:
-            json.dump(data, file)
+        self._write_indexed(file_path, data, get_codec(codec))
         logger.debug(f"Written data to {os.path.basename(file_path)}.")
+
+    async def async_clear_json(self, file_path: str,
+                               logger: logging.Logger = None,
+                               backup: bool = True) -> None:
+        """Same as `clear_json`, but runs on a worker thread so the event
+        loop isn't blocked.
+        """
+        await asyncio.to_thread(self.clear_json, file_path, logger=logger,
+                                backup=backup)
+
+    async def async_write(self, file_path: str, data: dict,
+                          logger: logging.Logger = None,
+                          backup: bool = True,
+                          codec: str = "json") -> None:
+        """Same as `write`, but serialises and writes on a worker thread so
+        the event loop isn't blocked.
+
+        `data` must not be modified until this returns.
+        """
+        await asyncio.to_thread(self.write, file_path, data, logger=logger,
+                                backup=backup, codec=codec)
+
+    def _write_indexed(self, file_path: str, data: dict,
+                       codec: Codec) -> None:
+        """Writes `data` and then its index, which is only valid for the
+        exact file it was written for.
+        """
+        if codec.name == "json":
+            offsets = self._atomic_dump(
+                file_path, lambda file: self._dump_top_level(file, data))
+        else:
+            offsets = self._atomic_dump(
+                file_path, lambda file: dump_framed(file, data, codec),
+                binary=True)
+
+        stat = os.stat(file_path)
+        # The temp file is created before the old file is replaced, so the
+        # inode always changes between writes.
+        index = {"inode": stat.st_ino,
+                 "size": stat.st_size,
+                 "mtime_ns": stat.st_mtime_ns,
+                 "keys": offsets}
+        self._atomic_dump(f"{file_path}{JSON_INDEX_SUFFIX}",
+                          lambda file: json.dump(index, file))
+
+    @staticmethod
+    def _dump_top_level(file, data: dict) -> dict[str, tuple[int, int]]:
+        """Dumps `data` the same as `json.dump` would, one top-level value at
+        a time.
+
+        :return: The (offset, length) of each top-level value in the file.
+            :rtype: dict[str, tuple[int, int]].
+        """
+        offsets = {}
+        # json.dumps escapes non-ASCII by default, so character offsets are
+        # also byte offsets.
+        position = file.write("{")
+        for i, (key, value) in enumerate(data.items()):
+            position += file.write(f"{', ' if i else ''}{json.dumps(key)}: ")
+            length = file.write(json.dumps(value))
+            offsets[key] = (position, length)
+            position += length
+        file.write("}")
+        return offsets
+
+    @staticmethod
+    def _atomic_dump(file_path: str, dump: Callable[[IO], Any],
+                     binary: bool = False) -> Any:
+        """Calls `dump` with a temporary file next to `file_path`, flushes
+        it to disk and then renames it over `file_path`.
+
+        :param file_path: The path to the JSON file.
+            :type file_path: str.
+        :param dump: Writes the content to the file it's given.
+            :type dump: Callable[[IO], Any].
+        :param binary: (Optional) Whether the file is opened in binary mode.
+            Defaults to False.
+            :type binary: bool.
+        :return: Whatever `dump` returned.
+        """
+        directory = os.path.dirname(os.path.abspath(file_path))
+        file = tempfile.NamedTemporaryFile(
+            "wb" if binary else "w", dir=directory, delete=False,
+            prefix=f".{os.path.basename(file_path)}.", suffix=".tmp"
+        )
+        try:
+            with file:
+                result = dump(file)
+                file.flush()
+                os.fsync(file.fileno())
+            if os.path.exists(file_path):
+                # Temporary files are created owner only.
+                shutil.copymode(file_path, file.name)
+            os.replace(file.name, file_path)
+        except BaseException:
+            os.remove(file.name)
+            raise
+
+        # Makes the rename itself durable, directories can't be opened on
+        # Windows, where the rename is already flushed.
+        if os.name == "posix":
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        return result
@@ -0,0 +1,120 @@
+"""
+Reward functions used by Solver.rank to score timetables, registered by their
+constant ID from constants.solver.
+
+Every reward is a penalty which never decreases as activities are added to a
+timetable, so the score of a partial timetable is an upper bound on the score
+of any timetable completing it. The solver relies on this to prune.
+"""
+from abc import ABC, abstractmethod
+from typing import Any
+
+from api.activity import Activity
+from constants.solver import *
+
+
+class Reward(ABC):
+    def __init__(self, weight: float = 1.0):
+        self.weight = weight
+
+    def initial_state(self) -> Any:
+        """State carried between calls to add, for penalties that depend on
+        more than one activity."""
+        return None
+
+    @abstractmethod
+    def add(self, state: Any, activities: tuple[Activity, ...]) -> tuple[Any, float]:
+        """
+        :param state: the state after the activities already in the timetable
+        :param activities: the (non-clashable) activities being added
+        :return: the new state and the penalty added, which must not be negative
+        """
+
+
+class EarlyClassReward(Reward):
+    """Penalises each class starting before `start`, because we all hate classes at 8 am."""
+    def __init__(self, weight: float = 1.0, start: int = EARLY_CLASS_START):
+        super().__init__(weight)
+        self.start = start
+
+    def add(self, state: Any, activities: tuple[Activity, ...]) -> tuple[Any, float]:
+        return state, self.weight * sum(activity.start < self.start for activity in activities)
+
+
+class DailyHoursReward(Reward):
+    """Penalises each hour of class past `max_minutes` in a day, on that weekday's
+    busiest week, so activities running in different weeks don't add up."""
+    def __init__(self, weight: float = 1.0, max_minutes: int = MAX_DAILY_MINUTES):
+        super().__init__(weight)
+        self.max_minutes = max_minutes
+        self._activity_weeks = {}  # Activity key -> weeks it runs in
+
+    def initial_state(self) -> tuple[tuple[dict[int, int], ...], tuple[int, ...]]:
+        # For each weekday, minutes of class in each week, and the most minutes past
+        # max_minutes in any week.
+        return ({},) * 7, (0,) * 7
+
+    def add(self, state: tuple[tuple[dict[int, int], ...], tuple[int, ...]],
+            activities: tuple[Activity, ...]
+            ) -> tuple[tuple[tuple[dict[int, int], ...], tuple[int, ...]], float]:
+        days, excess = state
+        new_days, new_excess = list(days), list(excess)
+        for activity in activities:
+            day = activity.day
+            if new_days[day] is days[day]:
+                new_days[day] = dict(days[day])  # States are shared between branches
+            weeks = new_days[day]
+
+            length = activity.end - activity.start
+            busiest = new_excess[day] + self.max_minutes
+            for week in self._weeks(activity):
+                total = weeks.get(week, 0) + length
+                weeks[week] = total
+                if total > busiest:
+                    busiest = total
+            new_excess[day] = busiest - self.max_minutes
+
+        # A weekday's excess is a max of growing totals, so it never decreases.
+        return (tuple(new_days), tuple(new_excess)), self.weight * (sum(new_excess) - sum(excess)) / 60
+
+    def _weeks(self, activity: Activity) -> list[int]:
+        # Cached, the same activities are added over and over by the search.
+        weeks = self._activity_weeks.get(activity.key)
+        if weeks is None:
+            weeks = self._activity_weeks[activity.key] = activity.weeks()
+        return weeks
+
+
+class BlockedTimeReward(Reward):
+    """Penalises each hour of class inside any of the given (day, start, end) windows,
+    day being an index into DAY_NAMES and start/end minutes since midnight."""
+    def __init__(self, weight: float = 1.0,
+                 windows: list[tuple[int, int, int]] = ()):
+        super().__init__(weight)
+        self.windows = [tuple(window) for window in windows]
+
+    def add(self, state: Any, activities: tuple[Activity, ...]) -> tuple[Any, float]:
+        overlap = sum(max(0, min(activity.end, end) - max(activity.start, start))
+                      for activity in activities
+                      for day, start, end in self.windows
+                      if activity.day == day)
+        return state, self.weight * overlap / 60
+
+
+REWARDS = {
+    EARLY_CLASS_REWARD: EarlyClassReward,
+    DAILY_HOURS_REWARD: DailyHoursReward,
+    BLOCKED_TIME_REWARD: BlockedTimeReward,
+}
+
+
+def make_rewards(preferences: dict[int, dict]) -> list[Reward]:
+    """
+    :param preferences: reward ID -> keyword arguments for that reward, e.g.
+        {EARLY_CLASS_REWARD: {"start": 10 * 60}, DAILY_HOURS_REWARD: {}}
+    :return: the rewards, in ID order
+    """
+    unknown = set(preferences) - set(REWARDS)
+    if unknown:
+        raise ValueError(f"Unknown reward IDs, {unknown}. Valid options are {list(REWARDS)}")
+    return [REWARDS[reward_id](**preferences[reward_id]) for reward_id in sorted(preferences)]
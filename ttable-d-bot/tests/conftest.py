@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The bot's packages are imported relative to ttable-d-bot, as when it runs.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
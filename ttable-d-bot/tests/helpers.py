@@ -0,0 +1,41 @@
+from api.TTableInputs import TTableInputs
+from api.timetable_api_calls import CourseTimetable
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+WEEKS = ["24/07/2023", "31/07/2023", "07/08/2023", "14/08/2023"]
+
+
+def make_course_versions(course_code: str, activities: list[dict]) -> dict:
+    """An S2 STLUC internal API response for a course, see
+    `CourseTimetable.request_course`.
+
+    :param activities: The fields of each activity, at least
+        "activity_group_code", "activity_code", "day_of_week" and
+        "start_time". Any other field can be given to override its default.
+    """
+    subject = f"{course_code}-S2-STLUC-IN"
+    payloads = {}
+    for activity in activities:
+        payload = {
+            "subject_code": subject,
+            "duration": "60",
+            "location": "50-T203",
+            "activity_type": "Practical",
+            "color": "#ffffff",
+            "selectable": "available",
+            "availability": 10,
+            "activitiesDays": WEEKS[:2],
+            **activity,
+        }
+        key = (f"{subject}|{payload['activity_group_code']}|"
+               f"{payload['activity_code']}")
+        payloads[key] = payload
+    return {f"{course_code}_S2_STLUC_IN": {"subject_code": subject,
+                                           "activities": payloads}}
+
+
+def make_course(course_code: str, course_versions: dict) -> CourseTimetable:
+    """The CourseTimetable of a `make_course_versions` response."""
+    return CourseTimetable(course_code, TTableInputs.Semester.S2,
+                           TTableInputs.Campus.STLUC,
+                           course_versions=course_versions)
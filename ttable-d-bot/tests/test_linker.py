@@ -0,0 +1,91 @@
+import copy
+import random
+import unittest
+
+from api.TTableInputs import TTableInputs
+from api.timetable_api_calls import CourseTimetable
+from helpers import DAYS, make_course, make_course_versions
+
+
+class PairwiseLinkerTimetable(CourseTimetable):
+    def _linker(self) -> None:
+        """The original pairwise `_linker`, kept to check the bucketed one
+        against.
+        """
+        for i, (main_key, main_value) in (
+                enumerate(self.get_activities().items())):
+            main_key = main_key.split("|")
+            if "-P" not in main_key[2]:
+                continue
+
+            for j, pair_key in enumerate(self.get_activities()):
+                split_pair_key = pair_key.split("|")
+                if (
+                        i == j or
+                        "-P" not in split_pair_key[2] or
+                        main_key[1] != split_pair_key[1]
+                ):
+                    continue
+
+                if main_key[2][:-1] == split_pair_key[2][:-1]:
+                    main_value["group"].append(pair_key)
+
+
+def random_course_versions(seed: int) -> dict:
+    """A random API response with paired (including "01-P10" style codes),
+    grouped and unpaired activities, in a random order.
+    """
+    rnd = random.Random(seed)
+    codes = []
+    for group in ("LEC1", "TUT1", "PRA1", "PRA2", "WKS1"):
+        for stream in range(1, rnd.randint(2, 4)):
+            if group.startswith("PRA"):
+                parts = rnd.sample(range(1, 13), rnd.randint(1, 3))
+                codes.extend((group, f"{stream:02d}-P{part}")
+                             for part in parts)
+            else:
+                codes.append((group, f"{stream:02d}"))
+    rnd.shuffle(codes)
+
+    return make_course_versions("CSSE2010", [
+        {"activity_group_code": group, "activity_code": code,
+         "day_of_week": rnd.choice(DAYS),
+         "start_time": f"{rnd.randint(8, 18):02d}:00"}
+        for group, code in codes
+    ])
+
+
+class TestLinker(unittest.TestCase):
+    def test_matches_pairwise_linker(self):
+        for seed in range(200):
+            with self.subTest(seed=seed):
+                course_versions = random_course_versions(seed)
+                course = make_course("CSSE2010",
+                                     copy.deepcopy(course_versions))
+                expected = PairwiseLinkerTimetable(
+                    "CSSE2010", TTableInputs.Semester.S2,
+                    TTableInputs.Campus.STLUC,
+                    course_versions=copy.deepcopy(course_versions))
+
+                self.assertEqual(
+                    {key: data["group"]
+                     for key, data in course.get_activities().items()},
+                    {key: data["group"]
+                     for key, data in expected.get_activities().items()}
+                )
+
+    def test_links_p10_separately_from_p1(self):
+        subject = "CSSE2010-S2-STLUC-IN"
+        course = make_course("CSSE2010", make_course_versions("CSSE2010", [
+            {"activity_group_code": "PRA1", "activity_code": code,
+             "day_of_week": "Mon", "start_time": "10:00"}
+            for code in ("01-P1", "01-P2", "01-P10", "01-P11")
+        ]))
+        groups = {key.split("|")[2]: data["group"]
+                  for key, data in course.get_activities().items()}
+        self.assertEqual(groups["01-P1"], [f"{subject}|PRA1|01-P2"])
+        self.assertEqual(groups["01-P10"], [f"{subject}|PRA1|01-P11"])
+
+
+if __name__ == "__main__":
+    unittest.main()
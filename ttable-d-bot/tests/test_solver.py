@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from api.timetable_api_calls import CourseTimetable
+from constants.solver import (BLOCKED_TIME_REWARD, DAILY_HOURS_REWARD,
+                              EARLY_CLASS_REWARD)
+from cop import Solver
+from helpers import DAYS, WEEKS, make_course, make_course_versions
+
+COURSE_CODES = ["CSSE2010", "CSSE2002", "MATH1051", "COMP3506"]
+PREFERENCES = {
+    EARLY_CLASS_REWARD: {},
+    DAILY_HOURS_REWARD: {"max_minutes": 180},
+    BLOCKED_TIME_REWARD: {"windows": [(4, 12 * 60, 18 * 60)]},
+}
+
+
+def random_course(course_code: str, rnd: random.Random) -> CourseTimetable:
+    """A random course with lectures, tutorials and paired practicals, some
+    running in only part of the semester.
+    """
+    codes = [("LEC1", "01"), ("LEC1", "02")]
+    codes += [("TUT1", f"{i:02d}") for i in range(1, rnd.randint(2, 4))]
+    codes += [("PRA1", f"{i:02d}-P{part}")
+              for i in range(1, rnd.randint(2, 4)) for part in (1, 2)]
+
+    return make_course(course_code, make_course_versions(course_code, [
+        {"activity_group_code": group, "activity_code": code,
+         "day_of_week": rnd.choice(DAYS),
+         "start_time": f"{rnd.randint(8, 17):02d}:00",
+         "duration": rnd.choice(["60", "120"]),
+         "activitiesDays": WEEKS[rnd.randint(0, 2):]}
+        for group, code in codes
+    ]))
+
+
+class TestSolver(unittest.TestCase):
+    def test_incremental_rank_matches_fresh_solver(self):
+        """Ranking after adding and removing courses and preferences gives
+        what a new Solver would, warm start and all.
+        """
+        for seed in range(5):
+            rnd = random.Random(seed)
+            courses = {code: random_course(code, rnd) for code in COURSE_CODES}
+            held = COURSE_CODES[:2]
+            solver = Solver([courses[code] for code in held])
+            for reward_id in (EARLY_CLASS_REWARD, DAILY_HOURS_REWARD):
+                solver.add_preference(reward_id, **PREFERENCES[reward_id])
+            solver.rank(k=5)
+
+            for step in range(8):
+                action = rnd.choice(["add", "remove", "preference"])
+                if action == "add" and len(held) < len(COURSE_CODES):
+                    code = rnd.choice([code for code in COURSE_CODES
+                                       if code not in held])
+                    solver.add_course(courses[code])
+                    held.append(code)
+                elif action == "remove" and len(held) > 1:
+                    code = rnd.choice(held)
+                    solver.remove_course(code)
+                    held.remove(code)
+                else:
+                    reward_id = rnd.choice(list(PREFERENCES))
+                    if reward_id in solver.preferences:
+                        solver.remove_preference(reward_id)
+                    else:
+                        solver.add_preference(reward_id,
+                                              **PREFERENCES[reward_id])
+
+                # Courses are re-added at the end, as are their ids, so a
+                # fresh Solver with them in the same order breaks ties alike.
+                fresh = Solver([courses[code] for code in held])
+                expected = fresh.rank(dict(solver.preferences), k=5)
+                for workers in (1, 2):
+                    with self.subTest(seed=seed, step=step, workers=workers):
+                        self.assertEqual(solver.rank(k=5, workers=workers),
+                                         expected)
+
+
+if __name__ == "__main__":
+    unittest.main()